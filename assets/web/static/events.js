@@ -0,0 +1,40 @@
+// Announce new sessions to the page: server-sent events from /events, or polling when the server refuses the stream
+var PhotoBooth = (function() {
+    var POLL_INTERVAL = 15000;
+    var callbacks = [];
+    var latest = document.body.dataset.latest || '';
+    var timer = null;
+
+    function publish(session) {
+        // Session identifiers are timestamps: they sort chronologically
+        if (session.id <= latest) return;
+        latest = session.id;
+        callbacks.forEach(function(callback) { callback(session); });
+    }
+
+    function poll() {
+        fetch('/api/sessions?limit=1')
+            .then(function(response) { return response.json(); })
+            .then(function(page) { if (page.sessions.length) publish(page.sessions[0]); })
+            .catch(function() {});
+    }
+
+    function startPolling() {
+        if (!timer) timer = setInterval(poll, POLL_INTERVAL);
+    }
+
+    if ('EventSource' in window) {
+        var source = new EventSource('/events');
+        source.addEventListener('session', function(event) { publish(JSON.parse(event.data)); });
+        source.onerror = function() {
+            // Browsers reconnect after a dropped stream, but not after an error status (503)
+            if (source.readyState === EventSource.CLOSED) startPolling();
+        };
+    } else {
+        startPolling();
+    }
+
+    return {
+        onSession: function(callback) { callbacks.push(callback); }
+    };
+})();
@@ -0,0 +1,68 @@
+// Infinite scroll: append the next pages of /api/sessions when the end of the gallery gets visible,
+// and insert new sessions at the top as they are announced
+(function() {
+    var gallery = document.getElementById('gallery');
+    var more = document.getElementById('more');
+    var cursor = more.dataset.cursor;
+    var limit = more.dataset.limit;
+    var loading = false;
+
+    function createCard(session) {
+        var card = document.createElement('div');
+        card.className = 'card';
+        card.dataset.session = session.id;
+        card.onclick = function() { window.location = session.url; };
+        var picture = document.createElement('picture');
+        var source = document.createElement('source');
+        source.type = 'image/webp';
+        source.srcset = session.srcset.webp;
+        source.sizes = '(max-width: 600px) 100vw, 340px';
+        var img = document.createElement('img');
+        img.src = session.thumbnail;
+        img.srcset = session.srcset.jpg;
+        img.sizes = source.sizes;
+        img.loading = 'lazy';
+        img.alt = '📸';
+        picture.appendChild(source);
+        picture.appendChild(img);
+        var footer = document.createElement('div');
+        footer.className = 'card-footer';
+        var link = document.createElement('a');
+        link.href = session.download;
+        link.className = 'btn';
+        link.textContent = '⬇️';
+        link.onclick = function(event) { event.stopPropagation(); };
+        footer.appendChild(link);
+        card.appendChild(picture);
+        card.appendChild(footer);
+        return card;
+    }
+
+    function loadMore() {
+        if (loading || !cursor) return;
+        loading = true;
+        fetch('/api/sessions?limit=' + limit + '&cursor=' + encodeURIComponent(cursor))
+            .then(function(response) { return response.json(); })
+            .then(function(page) {
+                page.sessions.forEach(function(session) { gallery.appendChild(createCard(session)); });
+                cursor = page.next_cursor;
+                loading = false;
+            })
+            .catch(function() { loading = false; });
+    }
+
+    PhotoBooth.onSession(function(session) {
+        if (document.querySelector('[data-session="' + session.id + '"]')) return;
+        gallery.insertBefore(createCard(session), gallery.firstChild);
+    });
+
+    if ('IntersectionObserver' in window) {
+        new IntersectionObserver(function(entries) {
+            if (entries[0].isIntersecting) loadMore();
+        }, { rootMargin: '600px' }).observe(more);
+    } else {
+        window.addEventListener('scroll', function() {
+            if (window.innerHeight + window.scrollY > document.body.offsetHeight - 600) loadMore();
+        });
+    }
+})();
@@ -0,0 +1,87 @@
+import os
+import time
+import zipfile
+from kivy.logger import Logger
+
+class _ChunkWriter:
+    """Unseekable file-like object collecting written bytes until drained."""
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+class SessionArchiver:
+    """
+    Stream sessions as a ZIP archive (STORED, JPEGs do not compress) with constant memory.
+    The archive is written straight to its destination, never to a temporary file.
+    """
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, files):
+        """
+        Args:
+            files: List of (session, filename, path) tuples, as returned by ExportProfile.list_files()
+        """
+        self._files = files
+
+    def get_total_size(self):
+        return sum(os.path.getsize(path) for _, _, path in self._files)
+
+    def iter_chunks(self):
+        """Yield the archive as a sequence of byte strings (for HTTP responses)."""
+        writer = _ChunkWriter()
+        with zipfile.ZipFile(writer, 'w', compression=zipfile.ZIP_STORED) as archive:
+            for session, filename, path in self._files:
+                for _ in self._add_file(archive, session, filename, path):
+                    data = writer.drain()
+                    if data: yield data
+        yield writer.drain()
+
+    def write_to(self, path, on_progress=None):
+        """
+        Write the archive to a file, fsync it and rename it into place.
+
+        Args:
+            path: Destination path of the archive
+            on_progress: Optional callback receiving a progress dict
+                         (label, bytes_done, bytes_total, rate, eta)
+        """
+        Logger.info(f'SessionArchiver: Writing {len(self._files)} files to {path}')
+        total = self.get_total_size()
+        done = 0
+        start = time.monotonic()
+        tmp = path + '.part'
+        with open(tmp, 'wb') as f:
+            # A seekable file lets zipfile patch local headers instead of using data descriptors
+            with zipfile.ZipFile(f, 'w', compression=zipfile.ZIP_STORED) as archive:
+                for session, filename, src in self._files:
+                    for size in self._add_file(archive, session, filename, src):
+                        done += size
+                        if on_progress and size:
+                            rate = done / max(time.monotonic() - start, 1e-6)
+                            on_progress({'label': filename, 'bytes_done': done, 'bytes_total': total, 'rate': rate, 'eta': (total - done) / rate if rate else None})
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def _add_file(self, archive, session, filename, path):
+        """Copy one file into the archive, yielding the number of bytes read after each chunk."""
+        zinfo = zipfile.ZipInfo.from_file(path, f'{session}/{filename}')
+        zinfo.compress_type = zipfile.ZIP_STORED
+        with open(path, 'rb') as src, archive.open(zinfo, 'w', force_zip64=zinfo.file_size > zipfile.ZIP64_LIMIT) as dst:
+            while True:
+                chunk = src.read(self.CHUNK_SIZE)
+                if not chunk: break
+                dst.write(chunk)
+                yield len(chunk)
+        yield 0
@@ -1,5 +1,7 @@
 import configparser
 
+from libs.export_profile import ExportProfile
+
 class Config:
     def __init__(self):
         self.config = configparser.ConfigParser()
@@ -17,6 +19,9 @@ class Config:
     def get_ringled(self):
         return self.config.getboolean('Global', 'RINGLED')
 
+    def get_ringled_simulator(self):
+        return self.config.getboolean('Global', 'RINGLED_SIMULATOR', fallback=False)
+
     def get_countdown(self):
         return self.config.getint('Picture', 'COUNTDOWN')
 
@@ -33,3 +38,40 @@ class Config:
 
     def get_filters(self):
         return self.config.getboolean('Picture', 'FILTERS')
+
+    def get_web_process(self):
+        return self.config.getboolean('Web', 'PROCESS', fallback=False)
+
+    def get_web_server(self):
+        return self.config.get('Web', 'SERVER', fallback='waitress')
+
+    def get_web_threads(self):
+        return self.config.getint('Web', 'THREADS', fallback=6)
+
+    def get_web_connection_limit(self):
+        return self.config.getint('Web', 'CONNECTION_LIMIT', fallback=200)
+
+    def get_web_url(self):
+        return self.config.get('Web', 'URL', fallback='http://192.168.4.1:5000')
+
+    def get_web_event_streams(self):
+        return self.config.getint('Web', 'EVENT_STREAMS', fallback=24)
+
+    def get_web_rate_limit(self):
+        return self.config.getfloat('Web', 'RATE_LIMIT', fallback=10)
+
+    def get_web_rate_burst(self):
+        return self.config.getint('Web', 'RATE_BURST', fallback=40)
+
+    def get_web_max_downloads(self):
+        return self.config.getint('Web', 'MAX_DOWNLOADS', fallback=4)
+
+    def get_export_profile(self):
+        section = self.config['Export'] if self.config.has_section('Export') else None
+        return ExportProfile.from_section(section)
+
+    def get_export_background(self):
+        return self.config.getboolean('Export', 'BACKGROUND', fallback=False)
+
+    def get_export_bandwidth(self):
+        return self.config.getfloat('Export', 'BANDWIDTH', fallback=0)
@@ -0,0 +1,194 @@
+import os
+import configparser
+from datetime import datetime
+from kivy.logger import Logger
+
+SESSION_FORMAT = '%Y%m%d_%H%M%S'
+
+class ExportProfile:
+    """
+    Describe which sessions and which files of each session are exported to a USB drive.
+    Defaults come from config.ini and can be overridden by a photobooth.ini file at the root of the drive.
+    """
+    # Content
+    CONTENT_ALL = 'all'
+    CONTENT_COLLAGES = 'collages'
+    CONTENT_ORIGINALS = 'originals'
+    CONTENTS = (CONTENT_ALL, CONTENT_COLLAGES, CONTENT_ORIGINALS)
+
+    # Session selection
+    SESSIONS_ALL = 'all'
+    SESSIONS_SINCE_LAST = 'since_last'
+    SESSIONS_RANGE = 'range'
+    SESSION_MODES = (SESSIONS_ALL, SESSIONS_SINCE_LAST, SESSIONS_RANGE)
+
+    DRIVE_CONFIG = 'photobooth.ini'
+    DRIVE_MARKER = '.photobooth_export'
+    DATE_FORMATS = ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d']
+
+    def __init__(self, content=CONTENT_ALL, sessions=SESSIONS_ALL, date_from=None, date_to=None, archive=False):
+        self.content = content
+        self.sessions = sessions
+        self.date_from = date_from
+        self.date_to = date_to
+        self.archive = archive
+
+    def __repr__(self):
+        return f'ExportProfile(content={self.content}, sessions={self.sessions}, from={self.date_from}, to={self.date_to}, archive={self.archive})'
+
+    @classmethod
+    def from_section(cls, section, default=None):
+        """
+        Build a profile from a configparser section, falling back on another profile.
+
+        Args:
+            section: configparser section (or None)
+            default: ExportProfile used for missing keys (and invalid values)
+        """
+        default = default or cls()
+        if section is None: return cls(default.content, default.sessions, default.date_from, default.date_to, default.archive)
+        return cls(
+            content=cls._get_choice(section, 'CONTENT', cls.CONTENTS, default.content),
+            sessions=cls._get_choice(section, 'SESSIONS', cls.SESSION_MODES, default.sessions),
+            date_from=cls._get_date(section, 'FROM', default.date_from),
+            date_to=cls._get_date(section, 'TO', default.date_to, end_of_day=True),
+            archive=section.getboolean('ARCHIVE', default.archive),
+        )
+
+    @staticmethod
+    def _get_choice(section, key, choices, default):
+        if key not in section: return default
+        value = section.get(key).strip().lower()
+        if value in choices: return value
+        Logger.warning(f"ExportProfile: Unknown {key} '{value}' (expected {', '.join(choices)}), using {default}")
+        return default
+
+    @classmethod
+    def _get_date(cls, section, key, default, end_of_day=False):
+        # An absent key keeps the default, None (or an empty value) removes the limit
+        if key not in section: return default
+        value = section.get(key)
+        if value.strip() in ('', 'None'): return None
+        date = cls.parse_date(value, end_of_day)
+        return date if date is not None else default
+
+    def for_drive(self, mountpoint):
+        """Return the profile to use for a drive, applying its photobooth.ini overrides if any."""
+        path = os.path.join(mountpoint, self.DRIVE_CONFIG)
+        if not os.path.exists(path): return self
+        parser = configparser.ConfigParser()
+        try:
+            parser.read(path)
+        except configparser.Error as e:
+            Logger.warning(f'ExportProfile: Ignoring invalid {path}: {e}')
+            return self
+        profile = ExportProfile.from_section(parser['Export'] if parser.has_section('Export') else None, self)
+        Logger.info(f'ExportProfile: Using {profile} from {path}')
+        return profile
+
+    @classmethod
+    def parse_date(cls, value, end_of_day=False):
+        if value is None or value.strip() in ('', 'None'): return None
+        for fmt in cls.DATE_FORMATS:
+            try:
+                date = datetime.strptime(value.strip(), fmt)
+            except ValueError:
+                continue
+            # A bare day as upper bound includes the whole day
+            if end_of_day and fmt == '%Y-%m-%d': date = date.replace(hour=23, minute=59, second=59)
+            return date
+        Logger.warning(f'ExportProfile: Cannot parse date {value}')
+        return None
+
+    @staticmethod
+    def get_session_date(session):
+        """Return the capture date encoded in a session directory name, or None."""
+        try:
+            return datetime.strptime(session, SESSION_FORMAT)
+        except ValueError:
+            return None
+
+    def select_sessions(self, sessions, last_export=None):
+        """
+        Filter session identifiers according to the profile.
+
+        Args:
+            sessions: Iterable of session identifiers
+            last_export: Last session exported to this drive (for since_last)
+
+        Returns:
+            Sorted list of selected session identifiers
+        """
+        selected = []
+        for session in sorted(sessions):
+            if self.sessions == self.SESSIONS_SINCE_LAST:
+                if last_export and session <= last_export: continue
+            elif self.sessions == self.SESSIONS_RANGE:
+                date = self.get_session_date(session)
+                if date is None: continue
+                if self.date_from and date < self.date_from: continue
+                if self.date_to and date > self.date_to: continue
+            selected.append(session)
+        return selected
+
+    @classmethod
+    def from_args(cls, args):
+        """
+        Build a profile from HTTP query arguments (content, from, to, since).
+
+        Returns:
+            Tuple (profile, last session to skip up to)
+        """
+        date_from = cls.parse_date(args.get('from'))
+        date_to = cls.parse_date(args.get('to'), end_of_day=True)
+        since = args.get('since')
+        if since: sessions = cls.SESSIONS_SINCE_LAST
+        elif date_from or date_to: sessions = cls.SESSIONS_RANGE
+        else: sessions = cls.SESSIONS_ALL
+        return cls(args.get('content', cls.CONTENT_COLLAGES), sessions, date_from, date_to), since
+
+    def list_files(self, index, last_export=None):
+        """
+        List the indexed files selected by the profile.
+
+        Args:
+            index: SessionIndex of the save directory
+            last_export: Last session already exported (for since_last)
+
+        Returns:
+            Tuple (list of selected sessions, list of (session, filename, path) tuples)
+        """
+        sessions = [session['id'] for session in index.list_sessions(with_collage=False)]
+        sessions = self.select_sessions(sessions, last_export)
+
+        files = []
+        for f in index.list_files(sessions):
+            if self.select_file(f['name']):
+                files.append((f['session'], f['name'], index.get_path(f['session'], f['name'])))
+        return sessions, files
+
+    def select_file(self, filename):
+        """Return True if a file of a session should be exported."""
+        if self.content == self.CONTENT_ALL: return True
+        if filename == 'collage.jpg': return True
+        if self.content == self.CONTENT_ORIGINALS:
+            return filename.startswith('capture-') and filename.endswith('.jpg')
+        return False
+
+    def read_last_export(self, mountpoint):
+        """Return the last session exported to a drive, or None."""
+        try:
+            with open(os.path.join(mountpoint, self.DRIVE_MARKER), 'r') as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def write_last_export(self, mountpoint, session):
+        """Remember the last session exported to a drive."""
+        try:
+            with open(os.path.join(mountpoint, self.DRIVE_MARKER), 'w') as f:
+                f.write(session)
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            Logger.warning(f'ExportProfile: Cannot write export marker: {e}')
@@ -11,6 +11,37 @@ class FileUtils:
         new_filename = f"{name}_small{ext}"
         return os.path.join(directory, new_filename)
 
+    @staticmethod
+    def get_image_size(path):
+        """
+        Read the dimensions of a JPEG file from its header without decoding it.
+
+        Returns:
+            Tuple (width, height), or None if the file is not a readable JPEG
+        """
+        try:
+            with open(path, 'rb') as f:
+                if f.read(2) != b'\xff\xd8': return None
+                while True:
+                    marker = f.read(2)
+                    if len(marker) < 2 or marker[0] != 0xFF: return None
+                    # Skip fill bytes
+                    while marker[1] == 0xFF:
+                        marker = marker[1:] + f.read(1)
+                        if len(marker) < 2: return None
+                    code = marker[1]
+                    # Standalone markers have no length
+                    if code == 0x01 or 0xD0 <= code <= 0xD8: continue
+                    length = int.from_bytes(f.read(2), 'big')
+                    # Start of frame markers (excluding DHT, JPG and DAC)
+                    if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+                        header = f.read(5)
+                        if len(header) < 5: return None
+                        return int.from_bytes(header[3:5], 'big'), int.from_bytes(header[1:3], 'big')
+                    f.seek(length - 2, os.SEEK_CUR)
+        except OSError:
+            return None
+
     @staticmethod
     def resize(image, max_height=1080, max_width=1920):
         # Get original dimensions
@@ -0,0 +1,464 @@
+import os
+import cv2
+import json
+import time
+import threading
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from kivy.logger import Logger
+
+# Each filter is a list of stages applied in order on a BGR uint8 image.
+# Colour stages only depend on the pixel value, spatial stages depend on neighbours.
+FILTERS = [
+    {'name': 'Color', 'key': 'color', 'stages': []},
+    {'name': 'B&W', 'key': 'bw', 'stages': [
+        {'op': 'gray'},
+    ]},
+    {'name': 'B&W Glam', 'key': 'bwglam', 'stages': [
+        {'op': 'gray'},
+        {'op': 'clahe', 'clip_limit': 2.0, 'tile': 8},
+        {'op': 'bilateral', 'd': 5, 'sigma_color': 50, 'sigma_space': 50},
+    ]},
+    {'name': 'Sepia', 'key': 'sepia', 'stages': [
+        {'op': 'matrix', 'matrix': [[0.272, 0.534, 0.131],
+                                    [0.349, 0.686, 0.168],
+                                    [0.393, 0.769, 0.189]]},
+    ]},
+    {'name': 'Glam', 'key': 'glam', 'stages': [
+        {'op': 'hsv', 'saturation': 1.3, 'value': 1.1},
+        {'op': 'contrast', 'alpha': 1.2, 'beta': 10},
+    ]},
+    {'name': 'Vintage', 'key': 'vintage', 'stages': [
+        {'op': 'hsv', 'saturation': 0.7},
+        {'op': 'gain', 'gains': [0.9, 1.0, 1.1]},
+    ]},
+    {'name': 'Warm Glow', 'key': 'warmglow', 'stages': [
+        {'op': 'gain', 'gains': [0.85, 1.05, 1.15]},
+        {'op': 'hsv', 'saturation': 1.2, 'value': 1.05},
+    ]},
+    {'name': 'Cool Tone', 'key': 'cooltone', 'stages': [
+        {'op': 'gain', 'gains': [1.15, 1.05, 0.9]},
+        {'op': 'contrast', 'alpha': 1.1, 'beta': -5},
+    ]},
+    {'name': 'Soft Focus', 'key': 'softfocus', 'stages': [
+        {'op': 'bilateral', 'd': 9, 'sigma_color': 75, 'sigma_space': 75, 'mix': 0.6},
+        {'op': 'glow', 'ksize': 21, 'weight': 0.15},
+        {'op': 'hsv', 'value': 1.08},
+    ]},
+    {'name': 'Retro 70s', 'key': 'retro70s', 'stages': [
+        {'op': 'contrast', 'alpha': 0.85, 'beta': 15},
+        {'op': 'gain', 'gains': [0.88, 1.08, 1.12]},
+        {'op': 'hsv', 'saturation': 0.85},
+    ]},
+    {'name': 'Pastel', 'key': 'pastel', 'stages': [
+        {'op': 'hsv', 'saturation': 0.5, 'value': 1.25},
+        {'op': 'blend', 'color': [255, 255, 255], 'weight': 0.25},
+    ]},
+    {'name': 'Polaroid', 'key': 'polaroid', 'stages': [
+        {'op': 'contrast', 'alpha': 0.9, 'beta': 10},
+        {'op': 'gain', 'gains': [1.05, 0.98, 1.02]},
+        {'op': 'hsv', 'saturation': 0.75},
+        {'op': 'vignette', 'sigma': 2.5, 'strength': 0.7},
+    ]},
+]
+
+def _gray(img, stage):
+    return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+
+def _matrix(img, stage):
+    # 3x3, or 3x4 with an offset column
+    return cv2.transform(img, np.array(stage['matrix'], dtype=np.float32))
+
+def _gain(img, stage):
+    result = img.astype(np.float32) * np.array(stage['gains'], dtype=np.float32)
+    return np.clip(result, 0, 255).astype(np.uint8)
+
+def _contrast(img, stage):
+    return cv2.convertScaleAbs(img, alpha=stage.get('alpha', 1.0), beta=stage.get('beta', 0))
+
+def _hsv(img, stage):
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV).astype(np.float32)
+    hsv[:, :, 1] *= stage.get('saturation', 1.0)
+    hsv[:, :, 2] *= stage.get('value', 1.0)
+    return cv2.cvtColor(np.clip(hsv, 0, 255).astype(np.uint8), cv2.COLOR_HSV2BGR)
+
+def _blend(img, stage):
+    weight = stage['weight']
+    color = np.empty_like(img)
+    color[:] = stage['color']
+    return cv2.addWeighted(img, 1 - weight, color, weight, 0)
+
+def _curves(img, stage):
+    # Tone curve per channel: {'b': [[x, y], ...], 'g': ..., 'r': ...} or 'all' for the three channels
+    ramp = np.arange(256)
+    tables = []
+    for channel in 'bgr':
+        points = np.array(stage.get(channel, stage.get('all', [[0, 0], [255, 255]])), dtype=np.float32)
+        tables.append(np.clip(np.rint(np.interp(ramp, points[:, 0], points[:, 1])), 0, 255).astype(np.uint8))
+    return cv2.LUT(img, np.dstack(tables).reshape(256, 1, 3))
+
+def _clahe(img, stage):
+    clahe = cv2.createCLAHE(clipLimit=stage.get('clip_limit', 2.0), tileGridSize=(stage.get('tile', 8),) * 2)
+    if img.ndim == 2: return clahe.apply(img)
+    return cv2.merge([clahe.apply(channel) for channel in cv2.split(img)])
+
+def _bilateral(img, stage):
+    smoothed = cv2.bilateralFilter(img, d=stage['d'], sigmaColor=stage['sigma_color'], sigmaSpace=stage['sigma_space'])
+    mix = stage.get('mix', 1.0)
+    if mix >= 1: return smoothed
+    return cv2.addWeighted(smoothed, mix, img, 1 - mix, 0)
+
+def _glow(img, stage):
+    ksize = stage.get('ksize', 21)
+    weight = stage.get('weight', 0.15)
+    blurred = cv2.GaussianBlur(img, (ksize, ksize), 0)
+    return cv2.addWeighted(img, 1 - weight, blurred, weight, 0)
+
+def _bilateral_fast(img, stage):
+    # Half resolution bilateral filter (about 8 times cheaper), for live previews
+    h, w = img.shape[:2]
+    small = cv2.resize(img, (w // 2, h // 2), interpolation=cv2.INTER_AREA)
+    smoothed = cv2.bilateralFilter(small, d=max(3, stage['d'] // 2), sigmaColor=stage['sigma_color'], sigmaSpace=stage['sigma_space'] / 2)
+    smoothed = cv2.resize(smoothed, (w, h), interpolation=cv2.INTER_LINEAR)
+    mix = stage.get('mix', 1.0)
+    if mix >= 1: return smoothed
+    return cv2.addWeighted(smoothed, mix, img, 1 - mix, 0)
+
+def _glow_fast(img, stage):
+    # Blur a quarter resolution copy: the glow is low frequency anyway
+    h, w = img.shape[:2]
+    ksize = max(3, stage.get('ksize', 21) // 4) | 1
+    weight = stage.get('weight', 0.15)
+    small = cv2.resize(img, (max(1, w // 4), max(1, h // 4)), interpolation=cv2.INTER_AREA)
+    blurred = cv2.resize(cv2.GaussianBlur(small, (ksize, ksize), 0), (w, h), interpolation=cv2.INTER_LINEAR)
+    return cv2.addWeighted(img, 1 - weight, blurred, weight, 0)
+
+def _vignette(img, stage):
+    rows, cols = img.shape[:2]
+    kernel_x = cv2.getGaussianKernel(cols, cols / stage.get('sigma', 2.5))
+    kernel_y = cv2.getGaussianKernel(rows, rows / stage.get('sigma', 2.5))
+    kernel = kernel_y * kernel_x.T
+    mask = kernel / kernel.max()
+    if img.ndim == 3: mask = np.dstack([mask] * img.shape[2])
+    strength = stage.get('strength', 0.7)
+    vignette = (img * mask).astype(np.uint8)
+    return cv2.addWeighted(img, 1 - strength, vignette, strength, 0)
+
+class FilterEngine:
+    """
+    Apply the photo filters. Consecutive colour stages of a filter are compiled into a single pass:
+    stages acting on each channel independently become a 1D cv2.LUT, a lone matrix stays a cv2.transform,
+    and runs mixing the channels (HSV adjustments) become a 3D lookup table sampled on a 64^3 grid,
+    built on first use (or by prepare()) and kept in a small LRU cache. Spatial stages run as they are,
+    except vignettes whose single channel masks are cached per (filter, shape).
+    """
+    COLOR_STAGES = {'matrix': _matrix, 'gain': _gain, 'contrast': _contrast, 'hsv': _hsv, 'blend': _blend, 'curves': _curves}
+    CHANNEL_STAGES = {'gain', 'contrast', 'blend', 'curves'}
+    SPATIAL_STAGES = {'gray': _gray, 'clahe': _clahe, 'bilateral': _bilateral, 'glow': _glow, 'vignette': _vignette}
+    # Cheaper approximations of the costly spatial stages, used when a preview cannot afford them
+    FAST_STAGES = {'bilateral': _bilateral_fast, 'glow': _glow_fast}
+
+    # A 3D table samples 2^LUT_BITS levels per channel (64^3 packed colours, 1 MB), looked up at the nearest level
+    LUT_BITS = 6
+    LUT_LEVELS = np.rint(np.arange(256) * ((1 << LUT_BITS) - 1) / 255).astype(np.uint8)
+    LUT_CACHE_SIZE = 16
+    STRIP_ROWS = 256
+    # Vignette masks of the thumbnail, preview and full sizes
+    MASK_CACHE_SIZE = 4
+
+    # Plugin filters must run within BUDGET seconds on a collage slot sized image (REFERENCE_SIZE),
+    # and should fit PREVIEW_BUDGET on a preview frame (fast version) to be usable live
+    REFERENCE_SIZE = (1800, 1200)
+    BUDGET = 1.0
+    PREVIEW_SIZE = (640, 480)
+    PREVIEW_BUDGET = 1 / 60
+
+    def __init__(self, filters=FILTERS, workers=None):
+        """
+        Args:
+            filters: List of filter definitions ({'name', 'key', 'stages'})
+            workers: Number of threads applying 3D tables and vignettes by strips (defaults to the number of CPUs, up to 4)
+        """
+        self._filters = OrderedDict((f['key'], f) for f in filters)
+        self._programs = {key: self._compile(f['stages']) for key, f in self._filters.items()}
+        self._luts = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._masks = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_workers=workers or min(4, cv2.getNumberOfCPUs()), thread_name_prefix='_filters')
+
+    def get_filters(self):
+        """Return the filter definitions, in display order."""
+        return list(self._filters.values())
+
+    def has_filter(self, key):
+        return key in self._filters
+
+    def register(self, filter_def, budget=BUDGET):
+        """
+        Add a filter (or replace the one with the same key) after checking that it is fast enough.
+
+        Args:
+            filter_def: Filter definition ({'name', 'key', 'stages'})
+            budget: Maximum seconds on a REFERENCE_SIZE image, None to skip the benchmark
+
+        Returns:
+            True if the filter was registered, False if it is invalid or too slow
+        """
+        key = filter_def.get('key')
+        try:
+            program = self._compile(filter_def['stages'])
+        except Exception as e:
+            Logger.error(f'FilterEngine: Invalid filter {key}: {e}')
+            return False
+
+        previous = (self._filters.get(key), self._programs.get(key))
+        self._filters[key] = filter_def
+        self._programs[key] = program
+        self._forget(key)
+        if budget is None: return True
+
+        try:
+            elapsed = self.benchmark(key, self.REFERENCE_SIZE)
+            preview = self.benchmark(key, self.PREVIEW_SIZE, fast=True)
+        except Exception as e:
+            elapsed, preview = None, None
+            Logger.error(f'FilterEngine: Filter {key} failed: {e}')
+        if elapsed is None or elapsed > budget:
+            if elapsed is not None: Logger.error(f'FilterEngine: Filter {key} rejected, {elapsed:.2f}s exceeds the {budget:.2f}s budget')
+            # Restore the filter it was replacing, if any
+            if previous[0] is None:
+                del self._filters[key]
+                del self._programs[key]
+            else:
+                self._filters[key], self._programs[key] = previous
+            self._forget(key)
+            return False
+
+        Logger.info(f'FilterEngine: Registered filter {key} ({elapsed:.3f}s, preview {preview * 1000:.0f} ms)')
+        if preview > self.PREVIEW_BUDGET:
+            Logger.warning(f'FilterEngine: Filter {key} is too slow for a smooth live preview ({preview * 1000:.0f} ms per frame)')
+        return True
+
+    def benchmark(self, key, size=REFERENCE_SIZE, fast=False, repeat=2):
+        """Return the best time in seconds to apply a filter on a photo-like image of the given (width, height)."""
+        img = make_test_image(size)
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            self.apply(img, key, fast=fast)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def _forget(self, key):
+        # Tables and masks built for a previous definition of the filter
+        with self._lock:
+            for cache in (self._luts, self._masks):
+                for cache_key in [k for k in cache if k[0] == key]: del cache[cache_key]
+
+    def has_fast_version(self, key):
+        """Return True if fast=True makes a difference for this filter."""
+        return any(kind == 'stage' and data['op'] in self.FAST_STAGES for kind, data in self._programs.get(key, []))
+
+    def _compile(self, stages):
+        # Split the stages into steps: ('stage', stage) or ('lut1d', table) or ('lut3d', stages)
+        steps = []
+        run = []
+        for stage in stages + [None]:
+            if stage is not None and stage['op'] in self.COLOR_STAGES:
+                run.append(stage)
+                continue
+            if run:
+                if all(s['op'] in self.CHANNEL_STAGES for s in run):
+                    steps.append(('lut1d', self._build_lut1d(run)))
+                elif len(run) == 1 and run[0]['op'] == 'matrix':
+                    steps.append(('stage', run[0]))
+                else:
+                    steps.append(('lut3d', run))
+                run = []
+            if stage is not None:
+                if stage['op'] not in self.SPATIAL_STAGES: raise ValueError(f"Unknown filter stage '{stage['op']}'")
+                steps.append(('stage', stage))
+        return steps
+
+    @classmethod
+    def _run_stages(cls, img, stages):
+        for stage in stages:
+            if stage['op'] in cls.COLOR_STAGES and img.ndim == 2: img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+            function = cls.COLOR_STAGES.get(stage['op']) or cls.SPATIAL_STAGES[stage['op']]
+            img = function(img, stage)
+        return img
+
+    @classmethod
+    def _build_lut1d(cls, stages):
+        # Per-channel stages: running them on a ramp gives the exact table
+        ramp = np.repeat(np.arange(256, dtype=np.uint8).reshape(256, 1, 1), 3, axis=2)
+        return cls._run_stages(ramp, stages)
+
+    @classmethod
+    def _build_lut3d(cls, stages):
+        # The colour of each grid entry: blue level in the low bits of its index, then green, then red
+        bits = cls.LUT_BITS
+        size = 1 << bits
+        levels = np.rint(np.arange(size) * 255 / (size - 1)).astype(np.uint8)
+        index = np.arange(1 << (3 * bits), dtype=np.uint32)
+        colors = np.dstack([levels[index & (size - 1)], levels[(index >> bits) & (size - 1)], levels[index >> (2 * bits)]])
+        result = cls._run_stages(colors.reshape(1 << (3 * bits - 9), 512, 3), stages)
+        return cv2.cvtColor(result, cv2.COLOR_BGR2BGRA).view(np.uint32).reshape(-1)
+
+    def _get_lut3d(self, key, index, stages):
+        cache_key = (key, index)
+        lut = self._get_cached(cache_key)
+        if lut is not None: return lut
+        # One build at a time: concurrent callers wait for a single build of the same table
+        with self._build_lock:
+            lut = self._get_cached(cache_key)
+            if lut is not None: return lut
+            lut = self._build_lut3d(stages)
+            with self._lock:
+                self._luts[cache_key] = lut
+                while len(self._luts) > self.LUT_CACHE_SIZE: self._luts.popitem(last=False)
+        Logger.info(f'FilterEngine: Built 3D table for {key}')
+        return lut
+
+    def _get_cached(self, cache_key):
+        with self._lock:
+            lut = self._luts.get(cache_key)
+            if lut is not None: self._luts.move_to_end(cache_key)
+            return lut
+
+    def _apply_lut3d(self, img, lut):
+        result = np.empty_like(img)
+        bits = self.LUT_BITS
+        def apply_strip(start):
+            # Nearest grid level of each channel, packed into the table index, replaced by the packed BGRA result
+            levels = cv2.LUT(img[start:start + self.STRIP_ROWS], self.LUT_LEVELS)
+            index = levels[:, :, 2].astype(np.uint32)
+            index <<= bits
+            index |= levels[:, :, 1]
+            index <<= bits
+            index |= levels[:, :, 0]
+            lut.take(index, out=index)
+            strip = index.view(np.uint8).reshape(index.shape + (4,))
+            cv2.cvtColor(strip, cv2.COLOR_BGRA2BGR, dst=result[start:start + self.STRIP_ROWS])
+        if img.shape[0] <= self.STRIP_ROWS:
+            apply_strip(0)
+        else:
+            list(self._executor.map(apply_strip, range(0, img.shape[0], self.STRIP_ROWS)))
+        return result
+
+    def _get_vignette_mask(self, key, shape, stage):
+        cache_key = (key, shape)
+        with self._lock:
+            mask = self._masks.get(cache_key)
+            if mask is not None:
+                self._masks.move_to_end(cache_key)
+                return mask
+        rows, cols = shape
+        sigma = stage.get('sigma', 2.5)
+        strength = stage.get('strength', 0.7)
+        # Outer product of the normalized kernels, folded with the strength into one scale per pixel
+        kernel_x = cv2.getGaussianKernel(cols, cols / sigma, cv2.CV_32F)
+        kernel_y = cv2.getGaussianKernel(rows, rows / sigma, cv2.CV_32F)
+        mask = (kernel_y / kernel_y.max()) * (kernel_x / kernel_x.max()).T
+        mask = np.rint((1 - strength + strength * mask) * 255).astype(np.uint8)
+        with self._lock:
+            self._masks[cache_key] = mask
+            while len(self._masks) > self.MASK_CACHE_SIZE: self._masks.popitem(last=False)
+        return mask
+
+    def _apply_vignette(self, img, key, stage):
+        mask = self._get_vignette_mask(key, img.shape[:2], stage)
+        if img.ndim == 2: return cv2.multiply(img, mask, scale=1 / 255)
+        # The single channel mask is only repeated per strip, never for the whole image
+        result = np.empty_like(img)
+        def apply_strip(start):
+            strip = mask[start:start + self.STRIP_ROWS]
+            cv2.multiply(img[start:start + self.STRIP_ROWS], cv2.merge([strip] * img.shape[2]),
+                         dst=result[start:start + self.STRIP_ROWS], scale=1 / 255)
+        list(self._executor.map(apply_strip, range(0, img.shape[0], self.STRIP_ROWS)))
+        return result
+
+    def prepare(self, key):
+        """Build the 3D tables of a filter ahead of time (e.g. in a background thread once it is selected for a preview)."""
+        for index, (kind, data) in enumerate(self._programs.get(key, [])):
+            if kind == 'lut3d': self._get_lut3d(key, index, data)
+
+    def apply(self, img, key, fast=False, build=True):
+        """
+        Apply a filter to an image.
+
+        Args:
+            img: BGR uint8 image (left untouched)
+            key: Filter key (unknown keys return the image as is)
+            fast: Use cheaper approximations of the costly spatial stages (live previews)
+            build: Build missing 3D tables now, otherwise filter stage by stage until prepare() has built them (UI thread)
+
+        Returns:
+            Filtered BGR uint8 image
+        """
+        program = self._programs.get(key)
+        if not program: return img
+        for index, (kind, data) in enumerate(program):
+            if kind != 'stage' and img.ndim == 2: img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+            if kind == 'lut1d':
+                img = cv2.LUT(img, data)
+            elif kind == 'lut3d':
+                lut = self._get_lut3d(key, index, data) if build else self._get_cached((key, index))
+                img = self._apply_lut3d(img, lut) if lut is not None else self._run_stages(img, data)
+            elif data['op'] == 'vignette':
+                img = self._apply_vignette(img, key, data)
+            elif fast and data['op'] in self.FAST_STAGES:
+                img = self.FAST_STAGES[data['op']](img, data)
+            else:
+                img = self._run_stages(img, [data])
+        if img.ndim == 2: img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+        return img
+
+    def apply_reference(self, img, key):
+        """Apply a filter stage by stage, without any table (used to check and benchmark the compiled version)."""
+        if key not in self._filters: return img
+        img = self._run_stages(img, self._filters[key]['stages'])
+        if img.ndim == 2: img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+        return img
+
+def make_test_image(size, seed=0):
+    """Return a smooth, photo-like BGR image of the given (width, height) covering many colours (for benchmarks)."""
+    rng = np.random.default_rng(seed)
+    width, height = size
+    noise = rng.integers(0, 256, (max(1, height // 10), max(1, width // 10), 3), dtype=np.uint8)
+    return cv2.GaussianBlur(cv2.resize(noise, (width, height)), (0, 0), 3)
+
+def load_filters(filters_dir='filters'):
+    """
+    Load filter plugins from a directory: one JSON file per filter ({'name', 'key', 'stages'}).
+
+    Args:
+        filters_dir: Directory containing filter JSON files
+
+    Returns:
+        List of filter definitions
+    """
+    filters = []
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    filters_path = os.path.join(module_dir, '..', filters_dir)
+
+    if not os.path.exists(filters_path):
+        return filters
+
+    for filename in sorted(os.listdir(filters_path)):
+        if filename.endswith('.json'):
+            try:
+                with open(os.path.join(filters_path, filename), 'r') as f:
+                    filter_def = json.load(f)
+                filter_def.setdefault('key', os.path.splitext(filename)[0])
+                filter_def.setdefault('name', filter_def['key'])
+                if not isinstance(filter_def.get('stages'), list): raise ValueError('missing stages')
+                filters.append(filter_def)
+                Logger.info(f"Loaded filter: {filter_def['name']} from {filename}")
+            except Exception as e:
+                Logger.error(f'Error loading filter {filename}: {e}')
+
+    return filters
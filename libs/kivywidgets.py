@@ -12,6 +12,8 @@ from kivy.metrics import sp
 from kivy.logger import Logger
 from kivy.core.window import Window
 import numpy as np
+import threading
+import time
 import cv2
 
 
@@ -19,12 +21,18 @@ from libs.file_utils import FileUtils
 
 # Widget to display camera
 class KivyCamera(Image):
+    # Share of the frame interval a live filter may use before falling back to its fast version
+    FILTER_BUDGET = 0.5
+
     def __init__(self, app, fps=30, blur=False, **kwargs):
         super(KivyCamera, self).__init__(**kwargs)
         self._app = app
         self._fps = fps
         self._blur = blur
         self._stop = False
+        self._filter = None
+        self._filter_time = None
+        self._slow_filters = set()  # Filters too slow for the preview, kept across sessions
         self._reuse_texture = None  # Réutilisation pour éviter allocations à chaque frame
         self.create_empty_texture()
 
@@ -38,6 +46,27 @@ class KivyCamera(Image):
         Clock.unschedule(self._clock)
         self._reuse_texture = None
 
+    def set_filter(self, key):
+        """Apply a filter (FilterEngine key) to the live preview, None to disable."""
+        self._filter = key
+        self._filter_time = None
+        # Frames are filtered stage by stage until the tables of the filter are built, away from the UI thread
+        if key: threading.Thread(name='_filter_prepare', target=self._app.filter_engine.prepare, args=(key,), daemon=True).start()
+
+    def _apply_filter(self, im):
+        fast = self._filter in self._slow_filters
+        start = time.perf_counter()
+        im = self._app.filter_engine.apply(im, self._filter, fast=fast, build=False)
+        elapsed = time.perf_counter() - start
+
+        # Smoothed cost of the filter, compared to the frame budget
+        self._filter_time = elapsed if self._filter_time is None else 0.8 * self._filter_time + 0.2 * elapsed
+        if not fast and self._filter_time > self.FILTER_BUDGET / self._fps and self._app.filter_engine.has_fast_version(self._filter):
+            Logger.info(f'KivyCamera: Filter {self._filter} takes {self._filter_time * 1000:.0f} ms, using its fast version')
+            self._slow_filters.add(self._filter)
+            self._filter_time = None
+        return im
+
     def create_empty_texture(self):
         width, height = self.size
         # Create a numpy array in 'bgr' format
@@ -55,6 +84,9 @@ class KivyCamera(Image):
             im = self._app.devices.get_preview(self._aspect_ratio)
             if im is None: return
 
+            # Filter the preview-sized frame, before it is scaled to the screen
+            if self._filter: im = self._apply_filter(im)
+
             # Generate blurry borders
             if self._blur:
                 im = FileUtils.blurry_borders(im, self.size)
@@ -82,6 +114,7 @@ class BlurredImage(Image):
         super(BlurredImage, self).__init__(**kwargs)
         self._blur = blur
         self._last_size = None
+        self._array = None
         if blur:
             self.bind(size=self.update_texture)
             self.create_empty_texture()
@@ -96,28 +129,36 @@ class BlurredImage(Image):
 
     def update_texture(self, *args):
         # Only reload if size actually changed significantly (avoid micro-updates)
-        if self.filepath and self._blur:
+        if self._array is not None and self._blur:
             current_size = (int(self.size[0]), int(self.size[1]))
             if self._last_size is None or \
                abs(current_size[0] - self._last_size[0]) > 10 or \
                abs(current_size[1] - self._last_size[1]) > 10:
                 self._last_size = current_size
-                self.reload()
+                self._show_array()
 
     def reload(self):
         try:
             im = cv2.imread(self.filepath)
             if im is None: return
-            im = cv2.flip(im, 0)
-            if self._blur: im = FileUtils.blurry_borders(im, self.size)
-            image_texture = Texture.create(size=(im.shape[1], im.shape[0]), colorfmt='bgr')
-            image_texture.blit_buffer(im.flatten(), colorfmt='bgr', bufferfmt='ubyte')
-            self.texture = image_texture
+            self.load_array(im)
         except Exception as e:
             Logger.error(f'Cannot open image {self.filepath}.')
             Logger.error(e)
             super().reload()
 
+    def load_array(self, im):
+        """Display a BGR image already in memory (e.g. a filtered preview), without any file round-trip."""
+        self._array = im
+        self._show_array()
+
+    def _show_array(self):
+        im = cv2.flip(self._array, 0)
+        if self._blur: im = FileUtils.blurry_borders(im, self.size)
+        image_texture = Texture.create(size=(im.shape[1], im.shape[0]), colorfmt='bgr')
+        image_texture.blit_buffer(im.tobytes(), colorfmt='bgr', bufferfmt='ubyte')
+        self.texture = image_texture
+
 Builder.load_string(
 """
 <BackgroundBoxLayout@BoxLayout>:
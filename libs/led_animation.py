@@ -0,0 +1,153 @@
+import time
+import threading
+import numpy as np
+from kivy.logger import Logger
+
+# Effects are pure functions of time: effect(t, num_pixels) returns the whole frame,
+# a (num_pixels, 3) array of [r, g, b] values (0-255), t being the seconds since the effect started.
+
+def off(t, num_pixels):
+    return np.zeros((num_pixels, 3))
+
+def solid(color):
+    def effect(t, num_pixels):
+        return np.tile(np.asarray(color, dtype=np.float64), (num_pixels, 1))
+    return effect
+
+def blink(color, period=0.2):
+    def effect(t, num_pixels):
+        return solid(color)(t, num_pixels) if t % period < period / 2 else off(t, num_pixels)
+    return effect
+
+def wave(color, speed=10, intensity=0.5):
+    # A sine of brightness travelling around the ring, one LED every 1/speed seconds
+    def effect(t, num_pixels):
+        phase = (np.arange(num_pixels) + t * speed) % num_pixels / num_pixels
+        level = intensity * (np.sin(2 * np.pi * phase) + 1) / 2
+        return level[:, None] * np.asarray(color, dtype=np.float64)
+    return effect
+
+def rainbow(speed=10):
+    # Full saturation hues around the ring, rotating by one LED every 1/speed seconds
+    def effect(t, num_pixels):
+        hue = (np.arange(num_pixels) + t * speed) % num_pixels / num_pixels
+        # HSV to RGB with s = v = 1: each channel is a clipped triangle wave of the hue
+        rgb = np.abs((hue[:, None] * 6 + np.array([0, 4, 2])) % 6 - 3) - 1
+        return np.clip(rgb, 0, 1) * 255
+    return effect
+
+def countdown(duration, top_pixel=0, color=(255, 255, 255)):
+    # The ring empties from the top pixel, one LED every duration / num_pixels: it is dark when the time is up
+    def effect(t, num_pixels):
+        order = [(top_pixel - i) % num_pixels for i in range(num_pixels)]
+        remaining = max(0, num_pixels - int(t * num_pixels / duration)) if t >= 0 else num_pixels
+        frame = off(t, num_pixels)
+        frame[order[num_pixels - remaining:]] = color
+        return frame
+    return effect
+
+class LedAnimator:
+    """
+    Render LED effects from one persistent thread at a fixed tick.
+    Every tick renders the whole frame of the current effect (crossfaded with the previous one
+    while switching) and sends it in one transfer, only when it changed.
+    """
+    FPS = 50
+    FADE = 0.3
+
+    def __init__(self, leds, num_pixels, fps=FPS, clock=time.monotonic):
+        """
+        Args:
+            leds: WS2812 strip (frames are sent with write())
+            num_pixels: Number of LEDs
+            fps: Render ticks per second
+            clock: Time source, shared with the caller when effects must be in sync with it (e.g. Kivy's Clock.get_boottime)
+        """
+        self._leds = leds
+        self._num_pixels = num_pixels
+        self._interval = 1 / fps
+        self._clock = clock
+        self._lock = threading.Condition()
+        self._current = (off, clock())
+        self._previous = None
+        self._fade_start = 0
+        self._fade = 0
+        self._generation = 0
+        self._rendered = 0
+        self._stop_event = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive(): return
+        self._stop_event.clear()
+        self._thread = threading.Thread(name='_led_animator', target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the render thread after switching the LEDs off."""
+        self.play(off, fade=0, wait=True)
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread and self._thread.is_alive(): self._thread.join()
+
+    def play(self, effect, fade=FADE, start=None, wait=False):
+        """
+        Switch to an effect.
+
+        Args:
+            effect: Function of (t, num_pixels) returning a frame
+            fade: Crossfade duration from the previous effect, in seconds
+            start: Time origin of the effect on the animator clock (defaults to now)
+            wait: Block until a frame of the effect has been sent
+        """
+        now = self._clock()
+        with self._lock:
+            self._previous = self._current if fade > 0 else None
+            self._current = (effect, now if start is None else start)
+            self._fade_start = now
+            self._fade = fade
+            self._generation += 1
+            generation = self._generation
+        self._wake.set()
+        if wait and self._thread and self._thread.is_alive():
+            with self._lock:
+                self._lock.wait_for(lambda: self._rendered >= generation or self._stop_event.is_set(), timeout=1)
+
+    def render(self, now):
+        """Return the frame (uint8) to display at a given time of the animator clock."""
+        with self._lock:
+            (effect, start), previous = self._current, self._previous
+            fade_start, fade = self._fade_start, self._fade
+        frame = effect(now - start, self._num_pixels)
+        if previous and now - fade_start < fade:
+            alpha = (now - fade_start) / fade
+            frame = alpha * frame + (1 - alpha) * previous[0](now - previous[1], self._num_pixels)
+        return np.clip(frame, 0, 255).astype(np.uint8)
+
+    def _run(self):
+        last = None
+        next_tick = self._clock()
+        while not self._stop_event.is_set():
+            with self._lock:
+                generation = self._generation
+            try:
+                frame = self.render(self._clock())
+                if last is None or not np.array_equal(frame, last):
+                    self._leds.write(frame)
+                    last = frame
+            except Exception as e:
+                Logger.error(f'LedAnimator: Cannot render frame: {e}')
+            with self._lock:
+                self._rendered = generation
+                self._lock.notify_all()
+
+            # Fixed tick, without accumulating delays; a new effect wakes the thread at once
+            next_tick += self._interval
+            delay = next_tick - self._clock()
+            if delay < 0:
+                next_tick = self._clock()
+                delay = 0
+            if self._wake.wait(delay):
+                self._wake.clear()
+                next_tick = self._clock()
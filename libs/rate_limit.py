@@ -0,0 +1,45 @@
+import time
+import threading
+
+class RateLimiter:
+    """
+    Token bucket per client: each client may burst up to `burst` requests,
+    then is refilled at `rate` requests per second.
+    """
+    MAX_CLIENTS = 1024
+
+    def __init__(self, rate, burst):
+        """
+        Args:
+            rate: Sustained number of requests per second allowed per client
+            burst: Number of requests a client may send at once
+        """
+        self._rate = rate
+        self._burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def allow(self, client):
+        """
+        Take a token from the bucket of a client.
+
+        Args:
+            client: Client key (usually its IP address)
+
+        Returns:
+            Tuple (allowed, retry_after) where retry_after is the number of seconds until a token is available
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(client, (self._burst, now))
+            tokens = min(self._burst, tokens + (now - last) * self._rate)
+            allowed = tokens >= 1
+            if allowed: tokens -= 1
+            if client not in self._buckets and len(self._buckets) >= self.MAX_CLIENTS: self._prune(now)
+            self._buckets[client] = (tokens, now)
+        return allowed, 0 if allowed else (1 - tokens) / self._rate
+
+    def _prune(self, now):
+        # Forget clients whose bucket is full again: they would start from a full bucket anyway
+        full = [client for client, (tokens, last) in self._buckets.items() if tokens + (now - last) * self._rate >= self._burst]
+        for client in full: del self._buckets[client]
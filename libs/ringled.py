@@ -1,137 +1,81 @@
 import time
-import math
-import threading
 try:
     import spidev
-    import colorsys
 except:
     spidev = None
 
+from kivy.clock import Clock
 from kivy.logger import Logger
 
 from libs.ws2812 import WS2812
+from libs.spi_simulator import SimulatedSpi, print_frame
+from libs.led_animation import LedAnimator, off, solid, blink, wave, rainbow, countdown
+
+def boottime():
+    """Clock.get_boottime() extrapolated to now: Kivy only updates it once per frame (never outside of the app loop)."""
+    return Clock.get_boottime() + Clock.time() - Clock.get_time()
 
 class RingLed:
-    def __init__(self, num_pixels=12):
+    """
+    WS2812 ring animated by a LedAnimator: each call switches the effect rendered by its thread.
+    Effects are timed with Kivy's clock, so that the countdown follows the one displayed on screen.
+    """
+    def __init__(self, num_pixels=12, spi=None, simulate=False):
+        """
+        Args:
+            num_pixels: Number of LEDs on the ring
+            spi: SPI device to use instead of opening spidev's bus 0 (e.g. a SimulatedSpi)
+            simulate: Send the frames to a SimulatedSpi drawing the ring in the terminal instead of the hardware
+        """
         Logger.info('RingLed: __init__().')
         self._num_pixels = num_pixels
         self._top_pixel = 6
-        if spidev is None: return
-        spi = spidev.SpiDev()
-        spi.open(0,0)
-        self._proc = None
-        self._stop = threading.Event()
+        self._animator = None
+        if spi is None and simulate:
+            spi = SimulatedSpi(realtime=True, on_frame=print_frame, clock=boottime)
+        if spi is None:
+            if spidev is None:
+                Logger.warning('RingLed: spidev is not available, LEDs disabled.')
+                return
+            spi = spidev.SpiDev()
+            spi.open(0,0)
         self._leds = WS2812(spi, self._num_pixels)
+        self._animator = LedAnimator(self._leds, self._num_pixels, clock=boottime)
+        self._animator.start()
 
-    def start_countdown(self, time_seconds):
+    def start_countdown(self, time_seconds, start_time=None):
+        """
+        Args:
+            time_seconds: Countdown duration
+            start_time: Clock.get_boottime() when the countdown started (defaults to now)
+        """
         Logger.info('RingLed: start_countdown().')
-        if spidev is None: return
-        if self._proc and self._proc.is_alive():
-            self._stop.set()
-            self._proc.join()
-        self._stop.clear()
-        self._proc = threading.Thread(target=self._countdown, args=[time_seconds])
-        self._proc.start()
+        if self._animator is None: return
+        self._animator.play(countdown(time_seconds, self._top_pixel), fade=0, start=start_time)
 
     def start_rainbow(self):
         Logger.info('RingLed: start_rainbow().')
-        if spidev is None: return
-        if self._proc and self._proc.is_alive():
-            self._stop.set()
-            self._proc.join()
-        self._stop.clear()
-        self._proc = threading.Thread(target=self._rainbow)
-        self._proc.start()
+        if self._animator is None: return
+        self._animator.play(rainbow())
 
     def flash(self, stop=False):
         Logger.info('RingLed: flash().')
-        if spidev is None: return
-        if self._proc and self._proc.is_alive():
-            self._stop.set()
-            self._proc.join()
-        self._stop.clear()
-        if not stop:
-            self._leds.fill([255,255,255])
-            time.sleep(0.1)
-        else:
-            self._leds.fill([0,0,0])
-        #self._proc = threading.Thread(target=self._flash)
-        #self._proc.start()
+        if self._animator is None: return
+        # Called from the capture thread: wait until the LEDs are actually on (or off)
+        self._animator.play(off if stop else solid([255,255,255]), fade=0, wait=True)
+        if not stop: time.sleep(0.1)
 
     def blink(self, color):
         Logger.info('RingLed: blink().')
-        if spidev is None: return
-        if self._proc and self._proc.is_alive():
-            self._stop.set()
-            self._proc.join()
-        self._stop.clear()
-        self._proc = threading.Thread(target=self._blink, args=[color,])
-        self._proc.start()
+        if self._animator is None: return
+        self._animator.play(blink(color), fade=0)
 
     def wave(self, color):
         Logger.info('RingLed: wave().')
-        if spidev is None: return
-        if self._proc and self._proc.is_alive():
-            self._stop.set()
-            self._proc.join()
-        self._stop.clear()
-        self._proc = threading.Thread(target=self._wave, args=[color,])
-        self._proc.start()
+        if self._animator is None: return
+        self._animator.play(wave(color))
 
     def clear(self):
         Logger.info('RingLed: clear().')
-        if spidev is None: return
-        if self._proc and self._proc.is_alive():
-            self._stop.set()
-            self._proc.join()
-        self._stop.clear()
-        self._leds.fill([0,0,0])
-
-    def _blink(self, color):
-        while True:
-            self._leds.fill(color)
-            time.sleep(0.1)
-            self._leds.fill([0,0,0])
-            time.sleep(0.1)
-            if self._stop.isSet(): return
-
-    def _wave(self, color):
-        wave_intensity = 0.5
-        wave_length = self._num_pixels
-        while True:
-            for step in range(self._num_pixels):
-                for i in range(self._num_pixels):
-                    # Calculate intensity based on a sine wave
-                    intensity = (math.sin(2 * math.pi * ((i + step) % wave_length) / wave_length) + 1) / 2
-                    intensity = wave_intensity * intensity  # Scale intensity to desired range
-                    self._leds.set(i, color, brightness=intensity)
-                    if self._stop.isSet(): return
-                time.sleep(0.1)
-
-    def _countdown(self, time_seconds):
-        time_between_pixels = time_seconds / self._num_pixels
-        p1 = reversed(range(0, self._top_pixel+1))
-        p2 = reversed(range(self._top_pixel, self._num_pixels))
-
-        self._leds.fill([255,255,255])
-        time.sleep(0.1)
-        for i in [*p1, *p2]:
-            self._leds.set(i, [0,0,0])
-            time.sleep(time_between_pixels)
-            if self._stop.isSet(): return
-
-    def _rainbow(self):
-        hue_step = 1.0 / self._num_pixels
-
-        while True:
-            for step in range(self._num_pixels):
-                for i in range(self._num_pixels):
-                    # Calculate hue for the current LED, with an offset for rotation
-                    hue = (hue_step * ((i + step) % self._num_pixels)) % 1.0
-                    # Convert HSV to RGB
-                    rgb = colorsys.hsv_to_rgb(hue, 1.0, 1.0)
-                    # Scale the RGB values to 0-255
-                    rgb_scaled = [int(255 * x) for x in rgb]
-                    self._leds.set(i, rgb_scaled)
-                    if self._stop.isSet(): return
-                time.sleep(0.1)
+        if self._animator is None: return
+        self._animator.play(off, fade=0, wait=True)
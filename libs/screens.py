@@ -1,7 +1,7 @@
 import random
+from concurrent.futures import ThreadPoolExecutor
 import cv2
-import numpy as np
-from kivy.clock import Clock
+from kivy.clock import Clock, mainthread
 from kivy.logger import Logger
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.floatlayout import FloatLayout
@@ -189,6 +189,28 @@ class WaitingScreen(BackgroundScreen):
         )
         overlay_layout.add_widget(version)
 
+        # Background USB export status
+        self.export_status = Label(
+            text='',
+            font_size=SMALL_FONT,
+            halign='left',
+            valign='middle',
+            size_hint=(0.3, 0.05),
+            pos_hint={'x': 0.02, 'y': 0.93},
+        )
+        overlay_layout.add_widget(self.export_status)
+
+        # Web server status (only shown when the gallery is not available)
+        self.web_status = Label(
+            text='',
+            font_size=SMALL_FONT,
+            halign='left',
+            valign='middle',
+            size_hint=(0.3, 0.05),
+            pos_hint={'x': 0.02, 'y': 0.88},
+        )
+        overlay_layout.add_widget(self.web_status)
+
         overlay_layout.bind(on_release=self.on_click)
 
         self.add_widget(overlay_layout)
@@ -204,6 +226,17 @@ class WaitingScreen(BackgroundScreen):
         if self.app.ringled:
             self.app.ringled.clear()
 
+    def on_update(self, kwargs={}):
+        if 'web' in kwargs:
+            status = kwargs.get('web')
+            self.web_status.text = '' if status == 'running' else f'Gallery {status}'
+        if not 'export' in kwargs: return
+        export = kwargs.get('export')
+        if export.get('error'): self.export_status.text = 'USB export failed'
+        elif export.get('done'): self.export_status.text = 'USB export done'
+        elif export.get('bytes_total'): self.export_status.text = f"USB export {100 * export.get('bytes_done', 0) // export.get('bytes_total')}%"
+        else: self.export_status.text = ''
+
     def on_click(self, obj):
         if not isinstance(obj.last_touch, MouseMotionEvent): return
         Logger.info('WaitingScreen: on_click().')
@@ -502,6 +535,7 @@ class CountdownScreen(ColorScreen):
         self._current_shot = 0
         self._current_format = 0
         self._timer_active = False
+        self._filter = 'color'
 
         self.time_remaining = self.app.COUNTDOWN
         self.total_countdown = self.app.COUNTDOWN
@@ -569,8 +603,45 @@ class CountdownScreen(ColorScreen):
             on_release=self.trigger_event
         )
 
+        # Filter selector (visible only when timer is not active) - top center, applied live to the preview
+        from kivy.uix.scrollview import ScrollView
+        self.filter_scroll = ScrollView(
+            size_hint=(0.6, 0.08),
+            pos_hint={'center_x': 0.5, 'top': 0.95},
+            do_scroll_x=True,
+            do_scroll_y=False,
+        )
+        filter_container = BoxLayout(orientation='horizontal', spacing=10, size_hint=(None, 1))
+        filter_container.bind(minimum_width=filter_container.setter('width'))
+        self.filter_chips = []
+        if self.app.FILTERS:
+            for filter_def in self.app.filter_engine.get_filters():
+                chip = RoundedButton(
+                    text=filter_def['name'],
+                    font_size=TINY_FONT,
+                    size_hint=(None, 1),
+                    background_color=HOME_COLOR,
+                )
+                chip.bind(texture_size=lambda chip, size: setattr(chip, 'width', size[0] + 40))
+                chip.filter_key = filter_def['key']
+                chip.bind(on_release=self.on_filter_selected)
+                filter_container.add_widget(chip)
+                self.filter_chips.append(chip)
+        self.filter_scroll.add_widget(filter_container)
+
         self.add_widget(self.layout)
 
+    def _update_filter_chips(self):
+        for chip in self.filter_chips:
+            chip.background_color = BORDER_COLOR if chip.filter_key == self._filter else HOME_COLOR
+
+    def on_filter_selected(self, obj):
+        if not isinstance(obj.last_touch, MouseMotionEvent): return
+        Logger.info(f'CountdownScreen: on_filter_selected({obj.filter_key}).')
+        self._filter = obj.filter_key
+        self._update_filter_chips()
+        self.camera.set_filter(None if self._filter == 'color' else self._filter)
+
     def on_entry(self, kwargs={}):
         Logger.info('CountdownScreen: on_entry().')
         self.time_remaining = self.app.COUNTDOWN
@@ -578,7 +649,9 @@ class CountdownScreen(ColorScreen):
         self._timer_active = False
         self._current_shot = kwargs.get('shot') if 'shot' in kwargs else 0
         self._current_format = kwargs.get('format') if 'format' in kwargs else 0
+        self._filter = kwargs.get('filter') if 'filter' in kwargs else 'color'
         aspect_ratio = self.app.get_format_aspect_ratio(self._current_format)
+        self.camera.set_filter(None if self._filter == 'color' else self._filter)
         self.camera.start(aspect_ratio)
         
         # Reset button icon and color (access child button from parent layout)
@@ -593,8 +666,11 @@ class CountdownScreen(ColorScreen):
             self.overlay_layout.add_widget(self.btn_home)
         if not self.btn_trigger.parent:
             self.overlay_layout.add_widget(self.btn_trigger)
+        if self.filter_chips and not self.filter_scroll.parent:
+            self.overlay_layout.add_widget(self.filter_scroll)
         if self.circular_counter.parent:
             self.overlay_layout.remove_widget(self.circular_counter)
+        self._update_filter_chips()
         
         self._clock = None
         self._clock_progress = None
@@ -617,6 +693,8 @@ class CountdownScreen(ColorScreen):
             self.overlay_layout.remove_widget(self.btn_home)
         if self.btn_trigger.parent:
             self.overlay_layout.remove_widget(self.btn_trigger)
+        if self.filter_scroll.parent:
+            self.overlay_layout.remove_widget(self.filter_scroll)
         self.camera.stop()
 
     def timer_progress(self, dt):
@@ -671,7 +749,7 @@ class CountdownScreen(ColorScreen):
             self._clock_trigger = Clock.schedule_once(self.timer_trigger, 1)
         else:
             # Display photo for validation
-            self.app.transition_to(ScreenMgr.CONFIRM_CAPTURE, shot=self._current_shot, format=self._current_format)
+            self.app.transition_to(ScreenMgr.CONFIRM_CAPTURE, shot=self._current_shot, format=self._current_format, filter=self._filter)
 
     def trigger_event(self, obj):
         if not isinstance(obj.last_touch, MouseMotionEvent): return
@@ -688,9 +766,11 @@ class CountdownScreen(ColorScreen):
 
     def start_countdown(self):
         Logger.info('CountdownScreen: start_countdown().')
-        # Hide home button
+        # Hide home button and filters
         if self.btn_home.parent:
             self.overlay_layout.remove_widget(self.btn_home)
+        if self.filter_scroll.parent:
+            self.overlay_layout.remove_widget(self.filter_scroll)
         
         # Show circular counter
         if not self.circular_counter.parent:
@@ -714,7 +794,7 @@ class CountdownScreen(ColorScreen):
         self._clock = Clock.schedule_once(self.timer_event, 1)
         self._clock_progress = Clock.schedule_interval(self.timer_progress, 1/30.0)
         if self.app.ringled:
-            self.app.ringled.start_countdown(self.time_remaining)
+            self.app.ringled.start_countdown(self.time_remaining, start_time=self.start_time)
 
     def cancel_countdown(self):
         Logger.info('CountdownScreen: cancel_countdown().')
@@ -730,9 +810,11 @@ class CountdownScreen(ColorScreen):
         if self.circular_counter.parent:
             self.overlay_layout.remove_widget(self.circular_counter)
         
-        # Show home button again
+        # Show home button and filters again
         if not self.btn_home.parent:
             self.overlay_layout.add_widget(self.btn_home)
+        if self.filter_chips and not self.filter_scroll.parent:
+            self.overlay_layout.add_widget(self.filter_scroll)
         
         # Update button icon and color (access child button from parent layout)
         for child in self.btn_trigger.children:
@@ -758,22 +840,6 @@ class ConfirmCaptureScreen(ColorScreen):
     | NO          YES |
     +-----------------+
     """
-    # Filter definitions
-    FILTERS = [
-        {'name': 'Color', 'key': 'color'},
-        {'name': 'B&W', 'key': 'bw'},
-        {'name': 'B&W Glam', 'key': 'bwglam'},
-        {'name': 'Sepia', 'key': 'sepia'},
-        {'name': 'Glam', 'key': 'glam'},
-        {'name': 'Vintage', 'key': 'vintage'},
-        {'name': 'Warm Glow', 'key': 'warmglow'},
-        {'name': 'Cool Tone', 'key': 'cooltone'},
-        {'name': 'Soft Focus', 'key': 'softfocus'},
-        {'name': 'Retro 70s', 'key': 'retro70s'},
-        {'name': 'Pastel', 'key': 'pastel'},
-        {'name': 'Polaroid', 'key': 'polaroid'},
-    ]
-    
     def __init__(self, app, **kwargs):
         Logger.info('ConfirmCaptureScreen: __init__().')
         super(ConfirmCaptureScreen, self).__init__(**kwargs)
@@ -782,7 +848,9 @@ class ConfirmCaptureScreen(ColorScreen):
         self._current_shot = 0
         self._current_format = 1
         self._selected_filter = 'color'  # Default filter
-        self._original_image = None  # Store original image
+        self._proxy_image = None  # Screen-sized copy used for the preview and thumbnails
+        self._entry = 0  # Incremented on each entry, so late thumbnails of a previous shot are dropped
+        self._executor = ThreadPoolExecutor(max_workers=min(4, cv2.getNumberOfCPUs()), thread_name_prefix='_confirmcapture')
 
         self.layout = AnchorLayout(padding=BORDER_THINKNESS, anchor_x='center', anchor_y='top')
         self.overlay_layout = FloatLayout()
@@ -860,7 +928,7 @@ class ConfirmCaptureScreen(ColorScreen):
         # Create filter cards (even if filters are disabled, to maintain consistent layout)
         self.filter_cards = []
         if self.app.FILTERS:
-            for filter_def in self.FILTERS:
+            for filter_def in self.app.filter_engine.get_filters():
                 card = self._create_filter_card(filter_def)
                 self.filter_container.add_widget(card)
                 self.filter_cards.append(card)
@@ -965,155 +1033,11 @@ class ConfirmCaptureScreen(ColorScreen):
         return card
     
     def _apply_filter(self, img, filter_key):
-        """Apply a filter to an image using OpenCV."""
-        if filter_key == 'color':
-            return img
-        
-        elif filter_key == 'bw':
-            # Black and white
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
-            
-        elif filter_key == 'bwglam':
-            # Black and white with soft glam effect - enhanced contrast and subtle smoothing
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-            enhanced = clahe.apply(gray)
-            smoothed = cv2.bilateralFilter(enhanced, d=5, sigmaColor=50, sigmaSpace=50)
-            return cv2.cvtColor(smoothed, cv2.COLOR_GRAY2BGR)
-        
-        elif filter_key == 'sepia':
-            # Sepia tone
-            sepia_filter = np.array([[0.272, 0.534, 0.131],
-                                    [0.349, 0.686, 0.168],
-                                    [0.393, 0.769, 0.189]])
-            sepia_img = cv2.transform(img, sepia_filter)
-            return np.clip(sepia_img, 0, 255).astype(np.uint8)
-        
-        elif filter_key == 'glam':
-            # Glam: increase contrast and saturation
-            hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV).astype(np.float32)
-            hsv[:, :, 1] = hsv[:, :, 1] * 1.3  # Increase saturation
-            hsv[:, :, 2] = hsv[:, :, 2] * 1.1  # Increase brightness
-            hsv = np.clip(hsv, 0, 255).astype(np.uint8)
-            result = cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
-            # Increase contrast
-            alpha = 1.2  # Contrast control
-            beta = 10    # Brightness control
-            return cv2.convertScaleAbs(result, alpha=alpha, beta=beta)
-        
-        elif filter_key == 'vintage':
-            # Vintage: reduced saturation, warm tones, slight vignette
-            hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV).astype(np.float32)
-            hsv[:, :, 1] = hsv[:, :, 1] * 0.7  # Reduce saturation
-            hsv = np.clip(hsv, 0, 255).astype(np.uint8)
-            result = cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
-            # Add warm tone
-            result[:, :, 0] = np.clip(result[:, :, 0] * 0.9, 0, 255)  # Reduce blue
-            result[:, :, 2] = np.clip(result[:, :, 2] * 1.1, 0, 255)  # Increase red
-            return result.astype(np.uint8)
-        
-        elif filter_key == 'warmglow':
-            # Warm Glow: golden hour effect with orange/golden tones
-            # Increase red and reduce blue for warmth
-            result = img.copy().astype(np.float32)
-            result[:, :, 0] = np.clip(result[:, :, 0] * 0.85, 0, 255)  # Reduce blue
-            result[:, :, 1] = np.clip(result[:, :, 1] * 1.05, 0, 255)  # Slight green boost
-            result[:, :, 2] = np.clip(result[:, :, 2] * 1.15, 0, 255)  # Increase red
-            # Add slight brightness and saturation
-            hsv = cv2.cvtColor(result.astype(np.uint8), cv2.COLOR_BGR2HSV).astype(np.float32)
-            hsv[:, :, 1] = np.clip(hsv[:, :, 1] * 1.2, 0, 255)  # Increase saturation
-            hsv[:, :, 2] = np.clip(hsv[:, :, 2] * 1.05, 0, 255)  # Slight brightness boost
-            return cv2.cvtColor(hsv.astype(np.uint8), cv2.COLOR_HSV2BGR)
-        
-        elif filter_key == 'cooltone':
-            # Cool Tone: modern cinematic look with blue/cyan emphasis
-            # Increase blue and cyan, reduce red
-            result = img.copy().astype(np.float32)
-            result[:, :, 0] = np.clip(result[:, :, 0] * 1.15, 0, 255)  # Increase blue
-            result[:, :, 1] = np.clip(result[:, :, 1] * 1.05, 0, 255)  # Slight green boost for cyan
-            result[:, :, 2] = np.clip(result[:, :, 2] * 0.9, 0, 255)   # Reduce red
-            # Enhance contrast slightly
-            alpha = 1.1  # Contrast
-            beta = -5    # Brightness (slightly darker)
-            result = cv2.convertScaleAbs(result, alpha=alpha, beta=beta)
-            return result
-        
-        elif filter_key == 'softfocus':
-            # Soft Focus: dreamy romantic effect with subtle blur
-            # Apply bilateral filter for skin smoothing while preserving edges
-            smoothed = cv2.bilateralFilter(img, d=9, sigmaColor=75, sigmaSpace=75)
-            # Blend original with smoothed version for soft focus effect
-            alpha = 0.6  # Weight of smoothed image
-            result = cv2.addWeighted(smoothed, alpha, img, 1 - alpha, 0)
-            # Add slight glow by blending with a blurred version
-            blurred = cv2.GaussianBlur(result, (21, 21), 0)
-            glow = cv2.addWeighted(result, 0.85, blurred, 0.15, 0)
-            # Slightly increase brightness for dreamy effect
-            hsv = cv2.cvtColor(glow, cv2.COLOR_BGR2HSV).astype(np.float32)
-            hsv[:, :, 2] = np.clip(hsv[:, :, 2] * 1.08, 0, 255)
-            return cv2.cvtColor(hsv.astype(np.uint8), cv2.COLOR_HSV2BGR)
-        
-        elif filter_key == 'retro70s':
-            # Retro 70s: nostalgic look with yellow/orange tones and reduced contrast
-            # Reduce contrast first
-            alpha = 0.85  # Reduced contrast
-            beta = 15     # Increased brightness
-            faded = cv2.convertScaleAbs(img, alpha=alpha, beta=beta)
-            # Add yellow/orange cast
-            result = faded.copy().astype(np.float32)
-            result[:, :, 0] = np.clip(result[:, :, 0] * 0.88, 0, 255)  # Reduce blue
-            result[:, :, 1] = np.clip(result[:, :, 1] * 1.08, 0, 255)  # Increase green
-            result[:, :, 2] = np.clip(result[:, :, 2] * 1.12, 0, 255)  # Increase red
-            # Reduce saturation slightly for vintage feel
-            hsv = cv2.cvtColor(result.astype(np.uint8), cv2.COLOR_BGR2HSV).astype(np.float32)
-            hsv[:, :, 1] = np.clip(hsv[:, :, 1] * 0.85, 0, 255)
-            return cv2.cvtColor(hsv.astype(np.uint8), cv2.COLOR_HSV2BGR)
-        
-        elif filter_key == 'pastel':
-            # Pastel Dream: soft pastel colors with increased brightness
-            # Increase brightness significantly
-            hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV).astype(np.float32)
-            hsv[:, :, 2] = np.clip(hsv[:, :, 2] * 1.25, 0, 255)  # Increase brightness
-            # Reduce saturation for pastel effect
-            hsv[:, :, 1] = np.clip(hsv[:, :, 1] * 0.5, 0, 255)   # Significantly reduce saturation
-            result = cv2.cvtColor(hsv.astype(np.uint8), cv2.COLOR_HSV2BGR)
-            # Add slight white overlay for pastel wash
-            white_overlay = np.ones_like(result) * 255
-            result = cv2.addWeighted(result, 0.75, white_overlay.astype(np.uint8), 0.25, 0)
-            return result
-        
-        elif filter_key == 'polaroid':
-            # Polaroid: vintage instant camera look with characteristic color shift
-            # Slight color shift and reduced contrast like old Polaroid photos
-            alpha = 0.9   # Slightly reduced contrast
-            beta = 10     # Slight brightness boost
-            faded = cv2.convertScaleAbs(img, alpha=alpha, beta=beta)
-            # Add characteristic Polaroid color cast (slightly cool with faded colors)
-            result = faded.copy().astype(np.float32)
-            result[:, :, 0] = np.clip(result[:, :, 0] * 1.05, 0, 255)  # Slight blue boost
-            result[:, :, 1] = np.clip(result[:, :, 1] * 0.98, 0, 255)  # Slight green reduction
-            result[:, :, 2] = np.clip(result[:, :, 2] * 1.02, 0, 255)  # Slight red boost
-            # Reduce saturation for faded look
-            hsv = cv2.cvtColor(result.astype(np.uint8), cv2.COLOR_BGR2HSV).astype(np.float32)
-            hsv[:, :, 1] = np.clip(hsv[:, :, 1] * 0.75, 0, 255)
-            result = cv2.cvtColor(hsv.astype(np.uint8), cv2.COLOR_HSV2BGR)
-            # Add slight vignette for authentic Polaroid look
-            rows, cols = result.shape[:2]
-            kernel_x = cv2.getGaussianKernel(cols, cols/2.5)
-            kernel_y = cv2.getGaussianKernel(rows, rows/2.5)
-            kernel = kernel_y * kernel_x.T
-            mask = kernel / kernel.max()
-            mask = np.dstack([mask] * 3)
-            vignette = result * mask
-            result = cv2.addWeighted(result, 0.3, vignette.astype(np.uint8), 0.7, 0)
-            return result
-        
-        return img
+        """Apply a filter to an image (see FilterEngine)."""
+        return self.app.filter_engine.apply(img, filter_key)
     
-    def _generate_thumbnail(self, img, filter_key, size=(110, 110)):
-        """Generate a thumbnail with the filter applied."""
-        # Resize image for thumbnail
+    def _make_thumbnail_source(self, img, size=(110, 110)):
+        """Downscale the image once, to the size of the thumbnails."""
         h, w = img.shape[:2]
         aspect = w / h
         if aspect > 1:
@@ -1123,26 +1047,45 @@ class ConfirmCaptureScreen(ColorScreen):
             new_h = size[1]
             new_w = int(size[1] * aspect)
         
-        thumbnail = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_AREA)
-        
-        # Apply filter
-        filtered = self._apply_filter(thumbnail, filter_key)
-        
-        return filtered
+        return cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_AREA)
     
-    def _update_filter_thumbnails(self):
-        """Generate thumbnails for all filters based on current image."""
-        if self._original_image is None:
-            return
-        
+    def _update_filter_thumbnails(self, entry, img):
+        """Generate thumbnails for all filters on the worker pool (each card is updated as soon as it is ready)."""
+        source = self._make_thumbnail_source(img)
         for card in self.filter_cards:
-            thumbnail = self._generate_thumbnail(self._original_image, card.filter_key)
-            
-            # Convert to texture
-            thumbnail_flipped = cv2.flip(thumbnail, 0)
-            texture = Texture.create(size=(thumbnail.shape[1], thumbnail.shape[0]), colorfmt='bgr')
-            texture.blit_buffer(thumbnail_flipped.flatten(), colorfmt='bgr', bufferfmt='ubyte')
-            card.thumbnail.texture = texture
+            self._executor.submit(self._generate_thumbnail, entry, card, source)
+    
+    def _generate_thumbnail(self, entry, card, source):
+        """Generate a thumbnail with the filter applied (in a worker thread)."""
+        if entry != self._entry: return
+        try:
+            thumbnail = cv2.flip(self._apply_filter(source, card.filter_key), 0)
+        except Exception as e:
+            Logger.error(f'ConfirmCaptureScreen: Cannot generate {card.filter_key} thumbnail: {e}')
+            return
+        self._show_thumbnail(entry, card, thumbnail)
+    
+    @mainthread
+    def _show_thumbnail(self, entry, card, thumbnail):
+        if entry != self._entry: return
+        texture = Texture.create(size=(thumbnail.shape[1], thumbnail.shape[0]), colorfmt='bgr')
+        texture.blit_buffer(thumbnail.tobytes(), colorfmt='bgr', bufferfmt='ubyte')
+        card.thumbnail.texture = texture
+        card.thumbnail.opacity = 1
+    
+    def _preview_filter(self, entry, filter_key):
+        """Apply a filter to the screen-sized proxy (in a worker thread)."""
+        try:
+            filtered = self._apply_filter(self._proxy_image, filter_key)
+        except Exception as e:
+            Logger.error(f'ConfirmCaptureScreen: Cannot preview {filter_key}: {e}')
+            return
+        self._show_preview(entry, filter_key, filtered)
+    
+    @mainthread
+    def _show_preview(self, entry, filter_key, filtered):
+        if entry != self._entry or filter_key != self._selected_filter: return
+        self.preview.load_array(filtered)
     
     def _update_selection_indicator(self):
         """Update visual indicator for selected filter."""
@@ -1161,25 +1104,19 @@ class ConfirmCaptureScreen(ColorScreen):
         
         self._selected_filter = obj.filter_key
         self._update_selection_indicator()
-        
-        # Apply filter to preview
-        if self._original_image is not None:
-            filtered_image = self._apply_filter(self._original_image.copy(), self._selected_filter)
-            
-            # Save filtered image temporarily
-            import tempfile
-            temp_path = tempfile.mktemp(suffix='.jpg')
-            cv2.imwrite(temp_path, filtered_image)
-            
-            # Update preview
-            self.preview.filepath = temp_path
-            self.preview.reload()
+        self._start_filter()
+    
+    def _start_filter(self):
+        if self._proxy_image is None: return
+        # Only the screen-sized proxy is filtered here: the shot itself is filtered at its slot size when the collage is assembled
+        self._executor.submit(self._preview_filter, self._entry, self._selected_filter)
 
     def on_entry(self, kwargs={}):
         Logger.info('ConfirmCaptureScreen: on_entry().')
         self._current_shot = kwargs.get('shot') if 'shot' in kwargs else 0
         self._current_format = kwargs.get('format') if 'format' in kwargs else 0
-        self._selected_filter = 'color'  # Reset to default filter
+        # Filter chosen on the countdown screen, or the default one
+        self._selected_filter = kwargs.get('filter') if 'filter' in kwargs else 'color'
         
         # Hide counter layout when only one photo is needed
         total_shots = self.app.get_shots_to_take(self._current_format)
@@ -1192,20 +1129,22 @@ class ConfirmCaptureScreen(ColorScreen):
             for i in range(0, total_shots): self.icons[i].text = ICON_SHOT_TO_TAKE
             for i in range(0, self._current_shot + 1): self.icons[i].text = ICON_SHOT_TAKEN
         
-        # Load image
+        # Load image (the small version is screen-sized: it is also the proxy filtered for the preview)
         original_path = FileUtils.get_small_path(self.app.get_shot(self._current_shot))
-        
-        # Load original image only if filters are enabled
-        if self.app.FILTERS:
-            self._original_image = cv2.imread(self.app.get_shot(self._current_shot))
+        self._proxy_image = cv2.imread(original_path)
         
         self.preview.filepath = original_path
-        self.preview.reload()
+        if self._proxy_image is not None: self.preview.load_array(self._proxy_image)
         
-        # Generate filter thumbnails only if filters are enabled
+        # Generate filter thumbnails in the background, only if filters are enabled:
+        # the screen shows at once and the thumbnails fill in progressively
+        self._entry += 1
         if self.app.FILTERS:
-            self._update_filter_thumbnails()
+            for card in self.filter_cards: card.thumbnail.opacity = 0
+            if self._proxy_image is not None:
+                self._executor.submit(self._update_filter_thumbnails, self._entry, self._proxy_image)
             self._update_selection_indicator()
+            if self._selected_filter != 'color': self._start_filter()
         
         self.auto_leave = Clock.schedule_once(self.timer_event, 60)
 
@@ -1216,25 +1155,18 @@ class ConfirmCaptureScreen(ColorScreen):
         if not isinstance(obj.last_touch, MouseMotionEvent): return
         Clock.unschedule(self.auto_leave)
         
-        # Apply selected filter to the original image and save it (only if filters are enabled)
-        if self.app.FILTERS and self._selected_filter != 'color' and self._original_image is not None:
-            filtered_image = self._apply_filter(self._original_image.copy(), self._selected_filter)
-            shot_path = self.app.get_shot(self._current_shot)
-            cv2.imwrite(shot_path, filtered_image)
-            # Also update small version
-            small_path = FileUtils.get_small_path(shot_path)
-            small_filtered = cv2.resize(filtered_image, (0, 0), fx=0.3, fy=0.3)
-            cv2.imwrite(small_path, small_filtered)
+        # The selected filter is applied to the slot-sized shot when the collage is assembled
+        self.app.set_shot_filter(self._current_shot, self._selected_filter if self.app.FILTERS else 'color')
         
         if self._current_shot == self.app.get_shots_to_take(self._current_format) - 1:
             self.app.transition_to(ScreenMgr.PROCESSING, format=self._current_format)
         else:
-            self.app.transition_to(ScreenMgr.COUNTDOWN, shot=self._current_shot + 1, format=self._current_format)
+            self.app.transition_to(ScreenMgr.COUNTDOWN, shot=self._current_shot + 1, format=self._current_format, filter=self._selected_filter)
 
     def no_event(self, obj):
         if not isinstance(obj.last_touch, MouseMotionEvent): return
         Clock.unschedule(self.auto_leave)
-        self.app.transition_to(ScreenMgr.COUNTDOWN, shot=self._current_shot, format=self._current_format)
+        self.app.transition_to(ScreenMgr.COUNTDOWN, shot=self._current_shot, format=self._current_format, filter=self._selected_filter)
 
     def home_event(self, obj):
         if not isinstance(obj.last_touch, MouseMotionEvent): return
@@ -1309,6 +1241,20 @@ class ProcessingScreen(ColorScreen):
         else:
             self.app.transition_to(ScreenMgr.CONFIRM_SAVE)
 
+def make_code_label():
+    """Label showing the short code of the saved session (guests type it in the gallery)."""
+    label = Label(
+        text='',
+        font_size=NORMAL_FONT,
+        bold=True,
+        halign='right',
+        valign='middle',
+        size_hint=(0.4, 0.1),
+        pos_hint={'right': 0.95, 'top': 0.95},
+    )
+    label.bind(size=label.setter('text_size'))
+    return label
+
 class ConfirmSaveScreen(ColorScreen):
     """
     +-----------------+
@@ -1322,6 +1268,8 @@ class ConfirmSaveScreen(ColorScreen):
         super(ConfirmSaveScreen, self).__init__(**kwargs)
 
         self.app = app
+        self._session_code = None
+        self._session_url = None
 
         self.layout = AnchorLayout(padding=BORDER_THINKNESS, anchor_x='center', anchor_y='top')
 
@@ -1363,6 +1311,10 @@ class ConfirmSaveScreen(ColorScreen):
                                  )
             overlay_layout.add_widget(btn_share)
 
+            # Session code - top right
+            self.code_label = make_code_label()
+            overlay_layout.add_widget(self.code_label)
+
         self.add_widget(self.layout)
 
     def on_entry(self, kwargs={}):
@@ -1372,7 +1324,10 @@ class ConfirmSaveScreen(ColorScreen):
             self.app.ringled.start_rainbow()
         self.preview.filepath = FileUtils.get_small_path(self.app.get_collage())
         self.preview.reload()
-        self.app.save_collage()
+        session = self.app.save_collage()
+        self._session_code, self._session_url = self.app.get_session_share(session)
+        if self.app.SHARE:
+            self.code_label.text = f'CODE {self._session_code}' if self._session_code else ''
 
     def on_exit(self, kwargs={}):
         Logger.info('ConfirmSaveScreen: on_exit().')
@@ -1396,7 +1351,7 @@ class ConfirmSaveScreen(ColorScreen):
         Clock.unschedule(self.auto_confirm)
         self.auto_confirm = Clock.schedule_once(self.timer_event, 60)
         # Show QR code popup
-        self.qr_popup = QRCodePopup(on_dismiss=self._dismiss_qr_popup)
+        self.qr_popup = QRCodePopup(on_dismiss=self._dismiss_qr_popup, url=self._session_url, code=self._session_code)
         self.layout.add_widget(self.qr_popup)
     
     def _dismiss_qr_popup(self):
@@ -1425,6 +1380,8 @@ class ConfirmPrintScreen(ColorScreen):
         super(ConfirmPrintScreen, self).__init__(**kwargs)
 
         self.app = app
+        self._session_code = None
+        self._session_url = None
         self._current_format = 0
 
         self.layout = AnchorLayout(padding=BORDER_THINKNESS, anchor_x='center', anchor_y='top')
@@ -1483,6 +1440,10 @@ class ConfirmPrintScreen(ColorScreen):
                                  )
             self.overlay_layout.add_widget(btn_share)
 
+            # Session code - top right
+            self.code_label = make_code_label()
+            self.overlay_layout.add_widget(self.code_label)
+
         self.add_widget(self.layout)
 
     def on_entry(self, kwargs={}):
@@ -1494,7 +1455,10 @@ class ConfirmPrintScreen(ColorScreen):
         self.preview.filepath = FileUtils.get_small_path(self.app.get_collage())
         self.preview.reload()
 
-        self.app.save_collage()
+        session = self.app.save_collage()
+        self._session_code, self._session_url = self.app.get_session_share(session)
+        if self.app.SHARE:
+            self.code_label.text = f'CODE {self._session_code}' if self._session_code else ''
 
     def on_exit(self, kwargs={}):
         Logger.info('ConfirmPrintScreen: on_exit().')
@@ -1519,7 +1483,7 @@ class ConfirmPrintScreen(ColorScreen):
         Clock.unschedule(self.auto_decline)
         self.auto_decline = Clock.schedule_once(self.timer_event, 60)
         # Show QR code popup
-        self.qr_popup = QRCodePopup(on_dismiss=self._dismiss_qr_popup)
+        self.qr_popup = QRCodePopup(on_dismiss=self._dismiss_qr_popup, url=self._session_url, code=self._session_code)
         self.layout.add_widget(self.qr_popup)
     
     def _dismiss_qr_popup(self):
@@ -1712,6 +1676,25 @@ class CopyingScreen(ColorScreen):
         )
         layout.add_widget(self.progress)
 
+        # Display progress bar
+        self.progress_bar = ThickProgressBar(
+            size_hint=(0.8, 0.05),
+            pos_hint={'center_x': 0.5},
+            max=1,
+            value=0,
+            color=PROGRESS_COLOR,
+        )
+        layout.add_widget(self.progress_bar)
+
+        # Display throughput and ETA
+        self.details = ResizeLabel(
+            size_hint=(0.9, 0.1),
+            pos_hint={'center_x': 0.5},
+            text='-',
+            max_font_size=SMALL_FONT,
+        )
+        layout.add_widget(self.details)
+
         # Display loading spinner
         loading = RotatingLabel(
             size_hint=(0.1, 0.1),
@@ -1726,6 +1709,9 @@ class CopyingScreen(ColorScreen):
 
     def on_entry(self, kwargs={}):
         Logger.info('CopyingScreen: on_entry().')
+        self.progress.text = '-'
+        self.details.text = '-'
+        self.progress_bar.value = 0
         if self.app.ringled:
             self.app.ringled.wave([255, 255, 255])
 
@@ -1735,16 +1721,29 @@ class CopyingScreen(ColorScreen):
             self.app.ringled.clear()
 
     def on_update(self, kwargs={}):
-        if not 'label' in kwargs: return
-        self.progress.text = f"Copying {kwargs.get('label')}"
+        if kwargs.get('label'):
+            self.progress.text = f"Copying {kwargs.get('label')}"
+        if not kwargs.get('bytes_total'): return
+        done, total = kwargs.get('bytes_done', 0), kwargs.get('bytes_total')
+        self.progress_bar.value = done / total
+        details = f"{done / 1e6:.0f} / {total / 1e6:.0f} MB - {kwargs.get('rate', 0) / 1e6:.1f} MB/s"
+        eta = kwargs.get('eta')
+        if eta is not None: details += f" - {int(eta) // 60}:{int(eta) % 60:02d} left"
+        self.details.text = details
 
 class QRCodePopup(FloatLayout):
-    """Popup overlay to show QR code."""
+    """Popup overlay to show the WiFi QR code, and the QR code of the session when available."""
     
     # Class-level cache for QR code texture (shared across all instances)
     _qr_texture_cache = None
     
-    def __init__(self, on_dismiss=None, **kwargs):
+    def __init__(self, on_dismiss=None, url=None, code=None, **kwargs):
+        """
+        Args:
+            on_dismiss: Callback called when the popup is closed
+            url: Optional URL of the session, shown as a second QR code
+            code: Optional short code of the session, shown below the QR codes
+        """
         super(QRCodePopup, self).__init__(**kwargs)
         self.on_dismiss = on_dismiss
         
@@ -1755,14 +1754,14 @@ class QRCodePopup(FloatLayout):
         
         self.bind(pos=self._update_bg, size=self._update_bg)
         
-        # Calculate responsive card size (max 60% of window width, 70% of height)
-        max_width = Window.width * 0.6
+        # Calculate responsive card size (max 60% of window width, 70% of height, wider for two QR codes)
+        max_width = Window.width * (0.85 if url else 0.6)
         max_height = Window.height * 0.7
-        card_width = min(max_width, 600)
+        card_width = min(max_width, 1100 if url else 600)
         card_height = min(max_height, 750)
         
         # Calculate QR code size based on card dimensions
-        qr_size = min(card_width * 0.7, card_height * 0.5)
+        qr_size = min(card_width * (0.4 if url else 0.7), card_height * 0.5)
         
         # White card container with responsive size using BoxLayout for better positioning
         from kivy.graphics import RoundedRectangle
@@ -1783,34 +1782,38 @@ class QRCodePopup(FloatLayout):
         self.card.bind(pos=self._update_card, size=self._update_card)
         
         # "SCAN ME" label
-        scan_label = Label(
-            text='SCAN ME',
-            size_hint=(1, None),
-            height=60,
-            font_size=SMALL_FONT,
-            bold=True,
-            color=(0, 0, 0, 1),
-            halign='center',
-            valign='middle',
-        )
-        scan_label.bind(size=scan_label.setter('text_size'))
+        scan_label = self._make_label('SCAN ME', 60)
         self.card.add_widget(scan_label)
         
-        # QR Code container (centered)
-        qr_container = AnchorLayout(
+        # QR Codes container (side by side, centered)
+        qr_row = BoxLayout(
+            orientation='horizontal',
             size_hint=(1, 1),
-            anchor_x='center',
-            anchor_y='center',
+            spacing=20,
         )
         
-        # QR Code image with responsive size
+        # WiFi QR code image with responsive size
         self.qr_image = Image(
             size_hint=(None, None),
             size=(qr_size, qr_size),
             allow_stretch=True,
         )
-        qr_container.add_widget(self.qr_image)
-        self.card.add_widget(qr_container)
+        qr_row.add_widget(self._make_qr_column(self.qr_image, '1. WIFI' if url else None))
+        
+        # Session QR code, scanned once connected to the booth WiFi
+        self.session_qr_image = None
+        if url:
+            self.session_qr_image = Image(
+                size_hint=(None, None),
+                size=(qr_size, qr_size),
+                allow_stretch=True,
+            )
+            qr_row.add_widget(self._make_qr_column(self.session_qr_image, '2. PHOTO'))
+        self.card.add_widget(qr_row)
+        
+        # Session code, for guests typing it in the gallery
+        if code:
+            self.card.add_widget(self._make_label(f'CODE {code}', 60))
         
         # Close button positioned below QR code
         btn_container = AnchorLayout(
@@ -1834,8 +1837,38 @@ class QRCodePopup(FloatLayout):
         
         self.add_widget(self.card)
         
-        # Generate QR code
+        # Generate QR codes
         self._generate_qr_code()
+        if url:
+            self.session_qr_image.texture = self._make_qr_texture(url)
+    
+    def _make_label(self, text, height):
+        label = Label(
+            text=text,
+            size_hint=(1, None),
+            height=height,
+            font_size=SMALL_FONT,
+            bold=True,
+            color=(0, 0, 0, 1),
+            halign='center',
+            valign='middle',
+        )
+        label.bind(size=label.setter('text_size'))
+        return label
+    
+    def _make_qr_column(self, image, caption):
+        """Center a QR code image, with an optional caption above it."""
+        column = BoxLayout(orientation='vertical', size_hint=(1, 1))
+        if caption:
+            column.add_widget(self._make_label(caption, 40))
+        container = AnchorLayout(
+            size_hint=(1, 1),
+            anchor_x='center',
+            anchor_y='center',
+        )
+        container.add_widget(image)
+        column.add_widget(container)
+        return column
     
     def on_touch_down(self, touch):
         """Block all touch events from reaching widgets below the popup."""
@@ -1861,19 +1894,26 @@ class QRCodePopup(FloatLayout):
             Logger.info('QRCodePopup: Using cached QR code')
             return
         
+        wifi_qr_data = "WIFI:T:nopass;S:PhotoBooth;P:;H:false;;"
+        self.qr_image.texture = self._make_qr_texture(wifi_qr_data)
+        
+        # Cache the texture for future use
+        QRCodePopup._qr_texture_cache = self.qr_image.texture
+        Logger.info('QRCodePopup: QR code generated and cached')
+    
+    @staticmethod
+    def _make_qr_texture(data):
         import qrcode
         import io
         from kivy.core.image import Image as CoreImage
         
-        wifi_qr_data = "WIFI:T:nopass;S:PhotoBooth;P:;H:false;;"
-        
         qr = qrcode.QRCode(
             version=1,
             error_correction=qrcode.constants.ERROR_CORRECT_L,
             box_size=10,
             border=4,
         )
-        qr.add_data(wifi_qr_data)
+        qr.add_data(data)
         qr.make(fit=True)
         
         img = qr.make_image(fill_color="black", back_color="white")
@@ -1881,12 +1921,7 @@ class QRCodePopup(FloatLayout):
         img.save(buf, format='PNG')
         buf.seek(0)
         
-        core_image = CoreImage(buf, ext='png')
-        self.qr_image.texture = core_image.texture
-        
-        # Cache the texture for future use
-        QRCodePopup._qr_texture_cache = core_image.texture
-        Logger.info('QRCodePopup: QR code generated and cached')
+        return CoreImage(buf, ext='png').texture
     
     def _close(self, obj):
         if not isinstance(obj.last_touch, MouseMotionEvent): return
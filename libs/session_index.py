@@ -0,0 +1,237 @@
+import os
+import secrets
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime
+from kivy.logger import Logger
+
+from libs.file_utils import FileUtils
+
+SESSION_FORMAT = '%Y%m%d_%H%M%S'
+
+class SessionIndex:
+    """
+    Persistent SQLite index of the sessions stored in the save directory.
+    Updated when a session is saved so that readers never have to walk the filesystem.
+    """
+    FILENAME = 'sessions.db'
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            id TEXT PRIMARY KEY,
+            timestamp TEXT,
+            template TEXT,
+            has_collage INTEGER NOT NULL DEFAULT 0,
+            code TEXT
+        );
+        CREATE TABLE IF NOT EXISTS files (
+            session TEXT NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+            name TEXT NOT NULL,
+            size INTEGER,
+            mtime REAL,
+            width INTEGER,
+            height INTEGER,
+            PRIMARY KEY (session, name)
+        );
+    """
+
+    # Short codes given to guests: no 0/O, 1/I/L to avoid typing mistakes
+    CODE_ALPHABET = '23456789ABCDEFGHJKMNPQRSTUVWXYZ'
+    CODE_LENGTH = 4
+    QUERY_BATCH = 500
+
+    def __init__(self, db_path, save_directory):
+        """
+        Args:
+            db_path: Path to the SQLite database (usually DCIM_DIRECTORY/sessions.db)
+            save_directory: Directory containing one sub-directory per session
+        """
+        Logger.info(f'SessionIndex: __init__({db_path})')
+        self._db_path = db_path
+        self._save_directory = save_directory
+        self._write_lock = threading.Lock()
+
+        is_new = not os.path.exists(db_path)
+        with self._write_lock, closing(self._connect()) as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(self.SCHEMA)
+            self._migrate(conn)
+
+        # Index sessions saved before the index existed
+        if is_new: self.rebuild()
+
+    def _migrate(self, conn):
+        # Indexes created before session codes existed
+        columns = [row['name'] for row in conn.execute('PRAGMA table_info(sessions)')]
+        if 'code' not in columns:
+            conn.execute('ALTER TABLE sessions ADD COLUMN code TEXT')
+        conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS sessions_code ON sessions(code)')
+        for row in conn.execute('SELECT id FROM sessions WHERE code IS NULL').fetchall():
+            conn.execute('UPDATE sessions SET code = ? WHERE id = ?', (self._generate_code(conn), row['id']))
+        conn.commit()
+
+    def _connect(self):
+        # One short-lived connection per call: the index is shared by the UI, USB and web server threads
+        conn = sqlite3.connect(self._db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA foreign_keys=ON')
+        return conn
+
+    def get_save_directory(self):
+        return self._save_directory
+
+    def get_path(self, session, filename):
+        return os.path.join(self._save_directory, session, filename)
+
+    def add_session(self, session, template=None, code=None):
+        """
+        Index (or re-index) a session directory.
+
+        Args:
+            session: Session identifier (directory name)
+            template: Optional name of the template used for the collage
+            code: Optional short code of the session (kept when re-indexing, generated otherwise)
+        """
+        scan = self._scan_session(session)
+        with self._write_lock, closing(self._connect()) as conn, conn:
+            existing = conn.execute('SELECT template, code FROM sessions WHERE id = ?', (session,)).fetchone()
+            if template is None and existing: template = existing['template']
+            if code is None and existing: code = existing['code']
+            self._insert_session(conn, session, scan, template, code)
+        Logger.info(f'SessionIndex: Indexed session {session} ({len(scan[2])} files)')
+
+    def _scan_session(self, session):
+        """Read the files of a session directory: returns (timestamp, has_collage, file rows)."""
+        session_path = os.path.join(self._save_directory, session)
+        files = []
+        for filename in sorted(os.listdir(session_path)):
+            path = os.path.join(session_path, filename)
+            if filename.startswith('.') or not os.path.isfile(path): continue
+            st = os.stat(path)
+            size = FileUtils.get_image_size(path) or (None, None)
+            files.append((session, filename, st.st_size, st.st_mtime, size[0], size[1]))
+
+        try:
+            timestamp = datetime.strptime(session, SESSION_FORMAT).isoformat()
+        except ValueError:
+            timestamp = None
+        has_collage = any(f[1] == 'collage.jpg' for f in files)
+        return timestamp, has_collage, files
+
+    def _insert_session(self, conn, session, scan, template, code):
+        # Called with the write lock held, inside the caller's transaction
+        timestamp, has_collage, files = scan
+        if code is None: code = self._generate_code(conn)
+        conn.execute('DELETE FROM files WHERE session = ?', (session,))
+        # Upsert rather than replace: the row keeps its files and a code collision raises instead of deleting another session
+        conn.execute('''INSERT INTO sessions (id, timestamp, template, has_collage, code) VALUES (?, ?, ?, ?, ?)
+                        ON CONFLICT(id) DO UPDATE SET timestamp = excluded.timestamp, template = excluded.template,
+                                                      has_collage = excluded.has_collage, code = excluded.code''',
+                     (session, timestamp, template, has_collage, code))
+        conn.executemany('INSERT INTO files (session, name, size, mtime, width, height) VALUES (?, ?, ?, ?, ?, ?)', files)
+
+    def _generate_code(self, conn):
+        # Called with the write lock held, so a free code stays free until it is inserted
+        while True:
+            code = ''.join(secrets.choice(self.CODE_ALPHABET) for _ in range(self.CODE_LENGTH))
+            if conn.execute('SELECT 1 FROM sessions WHERE code = ?', (code,)).fetchone() is None:
+                return code
+
+    def remove_session(self, session):
+        with self._write_lock, closing(self._connect()) as conn, conn:
+            conn.execute('DELETE FROM sessions WHERE id = ?', (session,))
+
+    def rebuild(self):
+        """Re-index every session directory found in the save directory."""
+        Logger.info('SessionIndex: rebuild()')
+        sessions = []
+        if os.path.exists(self._save_directory):
+            sessions = [d for d in os.listdir(self._save_directory) if os.path.isdir(os.path.join(self._save_directory, d))]
+        scans = {session: self._scan_session(session) for session in sessions}
+
+        # One transaction: readers keep seeing the previous index until the new one is complete
+        with self._write_lock, closing(self._connect()) as conn, conn:
+            # Keep the template and the code given to guests
+            existing = {row['id']: (row['template'], row['code']) for row in conn.execute('SELECT id, template, code FROM sessions')}
+            conn.execute('DELETE FROM sessions')
+            # Sessions keeping their code first, so that new codes are generated against every kept one
+            for session in sorted(sessions, key=lambda session: (existing.get(session, (None, None))[1] is None, session)):
+                template, code = existing.get(session, (None, None))
+                self._insert_session(conn, session, scans[session], template, code)
+        Logger.info(f'SessionIndex: Indexed {len(sessions)} sessions')
+        return len(sessions)
+
+    def get_session(self, session):
+        """Return a session as a dict, or None if it is not indexed."""
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT * FROM sessions WHERE id = ?', (session,)).fetchone()
+        return dict(row) if row else None
+
+    def get_session_by_code(self, code):
+        """Return the session identifier matching a short code (case insensitive), or None."""
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT id FROM sessions WHERE code = ?', (code.strip().upper(),)).fetchone()
+        return row['id'] if row else None
+
+    def get_latest(self, with_collage=True):
+        """Return the most recent session identifier, or None."""
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT id FROM sessions WHERE has_collage >= ? ORDER BY id DESC LIMIT 1', (int(with_collage),)).fetchone()
+        return row['id'] if row else None
+
+    def count(self, with_collage=True):
+        with closing(self._connect()) as conn:
+            return conn.execute('SELECT COUNT(*) FROM sessions WHERE has_collage >= ?', (int(with_collage),)).fetchone()[0]
+
+    def list_sessions(self, with_collage=True, before=None, limit=None):
+        """
+        List sessions, newest first.
+
+        Args:
+            with_collage: Only return sessions containing a collage
+            before: Only return sessions older than this session identifier
+            limit: Maximum number of sessions to return
+
+        Returns:
+            List of session dicts (id, timestamp, template, has_collage, code)
+        """
+        query = 'SELECT * FROM sessions WHERE has_collage >= ?'
+        params = [int(with_collage)]
+        if before:
+            query += ' AND id < ?'
+            params.append(before)
+        query += ' ORDER BY id DESC'
+        if limit:
+            query += ' LIMIT ?'
+            params.append(int(limit))
+        with closing(self._connect()) as conn:
+            return [dict(row) for row in conn.execute(query, params)]
+
+    def get_file(self, session, filename):
+        """Return the indexed metadata of a file (size, mtime, width, height), or None."""
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT * FROM files WHERE session = ? AND name = ?', (session, filename)).fetchone()
+        return dict(row) if row else None
+
+    def list_files(self, sessions=None):
+        """
+        List indexed files ordered by session and name.
+
+        Args:
+            sessions: Optional iterable of session identifiers to restrict the result
+
+        Returns:
+            List of file dicts (session, name, size, mtime, width, height)
+        """
+        with closing(self._connect()) as conn:
+            if sessions is None:
+                return [dict(row) for row in conn.execute('SELECT * FROM files ORDER BY session, name')]
+            rows = []
+            sessions = sorted(set(sessions))
+            # Batches stay below SQLite's limit on query parameters, and are ordered by session like the result
+            for i in range(0, len(sessions), self.QUERY_BATCH):
+                batch = sessions[i:i + self.QUERY_BATCH]
+                query = f'SELECT * FROM files WHERE session IN ({", ".join("?" * len(batch))}) ORDER BY session, name'
+                rows.extend(dict(row) for row in conn.execute(query, batch))
+            return rows
@@ -0,0 +1,112 @@
+import time
+import threading
+import numpy as np
+from collections import deque
+
+class SimulatedSpi:
+    """
+    Stand-in for spidev.SpiDev that decodes the WS2812 bitstream sent by WS2812 back into frames.
+    Each received frame is kept with its timestamp, so effects, frame rates and their timing
+    can be checked without LEDs.
+    """
+    MAX_FRAMES = 10000
+
+    def __init__(self, realtime=False, on_frame=None, max_frames=MAX_FRAMES, clock=time.monotonic):
+        """
+        Args:
+            realtime: Block each transfer for its duration on the wire, like a real SPI bus
+            on_frame: Optional callback receiving (timestamp, frame) for each decoded frame
+            max_frames: Number of frames kept in memory
+            clock: Time source of the timestamps (use the animator clock to compare frames with effect times)
+        """
+        self.max_speed_hz = 500000
+        self._realtime = realtime
+        self._clock = clock
+        self._on_frame = on_frame
+        self._frames = deque(maxlen=max_frames)
+        self._lock = threading.Lock()
+        self._errors = 0
+
+    # spidev.SpiDev interface
+
+    def open(self, bus, device):
+        pass
+
+    def close(self):
+        pass
+
+    def writebytes2(self, data):
+        self._receive(np.frombuffer(bytes(data), dtype=np.uint8), self.max_speed_hz)
+
+    def xfer(self, data, speed_hz=0, delay_usec=0, bits_per_word=8):
+        self._receive(np.asarray(data, dtype=np.uint8), speed_hz or self.max_speed_hz)
+        return [0] * len(data)
+
+    # Decoded frames
+
+    @staticmethod
+    def decode(tx):
+        """
+        Decode a WS2812 SPI bitstream.
+
+        Args:
+            tx: uint8 array of 12 SPI bytes per LED
+
+        Returns:
+            (nb_leds, 3) uint8 array of [r, g, b], or None if the stream is malformed
+        """
+        # Each SPI byte is 1 b1 b1 0 1 b0 b0 0 and carries 2 bits of a colour byte, MSB first
+        if len(tx) % 12 or np.any(tx & 0x99 != 0x88): return None
+        pairs = ((tx >> 5) & 1) << 1 | ((tx >> 1) & 1)
+        values = (pairs.reshape(-1, 4) << np.array([6, 4, 2, 0], dtype=np.uint8)).sum(axis=1).astype(np.uint8)
+        return values.reshape(-1, 3)[:, [1, 0, 2]]
+
+    def _receive(self, tx, speed_hz):
+        start = self._clock()
+        frame = self.decode(tx)
+        if frame is None:
+            with self._lock:
+                self._errors += 1
+            return
+        with self._lock:
+            self._frames.append((start, frame))
+        if self._on_frame: self._on_frame(start, frame)
+        if self._realtime:
+            # 8 bits per byte on the wire, then the 50 us reset that latches the frame
+            remaining = len(tx) * 8 / speed_hz + 50e-6 - (self._clock() - start)
+            if remaining > 0: time.sleep(remaining)
+
+    def get_frames(self, since=None):
+        """Return the list of (timestamp, frame) received, optionally only from a timestamp on."""
+        with self._lock:
+            frames = list(self._frames)
+        if since is None: return frames
+        return [(timestamp, frame) for timestamp, frame in frames if timestamp >= since]
+
+    def get_last_frame(self):
+        with self._lock:
+            return self._frames[-1][1] if self._frames else None
+
+    def get_errors(self):
+        """Return the number of malformed transfers."""
+        with self._lock:
+            return self._errors
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self._errors = 0
+
+    def get_fps(self, since=None):
+        """Return the rate of frames received (per second), optionally only after a timestamp."""
+        frames = self.get_frames(since)
+        if len(frames) < 2: return 0.0
+        return (len(frames) - 1) / (frames[-1][0] - frames[0][0])
+
+def render_terminal(frame):
+    """Return a frame as a line of coloured blocks (24-bit ANSI colours) to display the ring in a terminal."""
+    return ''.join(f'\x1b[38;2;{r};{g};{b}m●\x1b[0m ' for r, g, b in frame.tolist())
+
+def print_frame(timestamp, frame):
+    """SimulatedSpi on_frame callback redrawing the ring on the current terminal line."""
+    print('\r' + render_terminal(frame), end='', flush=True)
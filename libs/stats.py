@@ -0,0 +1,124 @@
+import os
+import json
+import atexit
+import threading
+from datetime import datetime
+from kivy.logger import Logger
+
+class StatsAggregator:
+    """
+    In-memory usage statistics for the web server.
+    Events only bump counters in memory; the JSON file is rewritten in the background
+    when something changed, and on shutdown, using an atomic rename.
+    """
+    FLUSH_INTERVAL = 30
+
+    DEFAULTS = {
+        'photos_taken': 0,
+        'downloads': 0,
+        'gallery_views': 0,
+        'collage_views': 0,
+        'image_views': 0,
+        'first_photo_date': None,
+        'last_photo_date': None,
+        'last_download_date': None,
+        'sessions': []
+    }
+
+    def __init__(self, path, flush_interval=FLUSH_INTERVAL):
+        """
+        Args:
+            path: Path to the JSON statistics file
+            flush_interval: Seconds between two background flushes
+        """
+        self._path = path
+        self._flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._exit_flush = False
+        self._dirty = False
+        self._stats = self._load()
+
+    def _load(self):
+        stats = json.loads(json.dumps(self.DEFAULTS))
+        try:
+            if os.path.exists(self._path):
+                with open(self._path, 'r') as f:
+                    stats.update(json.load(f))
+        except Exception as e:
+            Logger.error(f'StatsAggregator: Error loading stats: {e}')
+        return stats
+
+    def start(self):
+        """Start the background flush thread (also flushes at interpreter exit)."""
+        if self._thread and self._thread.is_alive(): return
+        self._stop_event.clear()
+        self._thread = threading.Thread(name='_stats_flush', target=self._flush_loop, daemon=True)
+        self._thread.start()
+        # Once per aggregator, however many times it is restarted
+        if not self._exit_flush:
+            atexit.register(self.flush)
+            self._exit_flush = True
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join()
+        self.flush()
+
+    def _flush_loop(self):
+        while not self._stop_event.wait(self._flush_interval):
+            self.flush()
+
+    def increment(self, counter, amount=1, date_key=None):
+        """
+        Increment a counter in memory.
+
+        Args:
+            counter: Counter name (e.g. 'downloads')
+            amount: Increment
+            date_key: Optional key updated with the current date (e.g. 'last_download_date')
+        """
+        now = datetime.now().isoformat() if date_key else None
+        with self._lock:
+            self._stats[counter] = self._stats.get(counter, 0) + amount
+            if date_key: self._stats[date_key] = now
+            self._dirty = True
+
+    def track_photo(self, session_id=None):
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._stats['photos_taken'] += 1
+            self._stats['last_photo_date'] = now
+            if self._stats['first_photo_date'] is None:
+                self._stats['first_photo_date'] = now
+            if session_id and session_id not in self._stats['sessions']:
+                self._stats['sessions'].append(session_id)
+            self._dirty = True
+            return self._stats['photos_taken']
+
+    def snapshot(self):
+        """Return a copy of the current statistics."""
+        with self._lock:
+            return json.loads(json.dumps(self._stats))
+
+    def flush(self):
+        """Write statistics to disk if they changed since the last flush."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty: return
+                data = json.dumps(self._stats, indent=2)
+                self._dirty = False
+            tmp = self._path + '.tmp'
+            try:
+                with open(tmp, 'w') as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self._path)
+            except Exception as e:
+                Logger.error(f'StatsAggregator: Error saving stats: {e}')
+                with self._lock:
+                    self._dirty = True
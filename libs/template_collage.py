@@ -177,7 +177,7 @@ class TemplateCollage:
         self._preview_cache = tmp_output
         return tmp_output
     
-    def assemble(self, image_paths, output_path=None, for_print=False):
+    def assemble(self, image_paths, output_path=None, for_print=False, filters=None, filter_engine=None):
         """
         Assemble photos into a collage based on the template.
         Simple approach: create canvas, apply background, paste photos (clipping if needed), apply foreground.
@@ -186,6 +186,8 @@ class TemplateCollage:
             image_paths: List of paths to input images
             output_path: Optional path to save the output
             for_print: If True, apply duplication for printing. If False (default), don't duplicate.
+            filters: Optional list of filter keys, one per photo slot (applied to the slot-sized photo)
+            filter_engine: FilterEngine applying the filters
             
         Returns:
             The assembled collage as a numpy array
@@ -222,6 +224,10 @@ class TemplateCollage:
             # Resize and crop image to target dimensions
             img_resized = FileUtils.resize_and_crop(img, (height, width))
             
+            # Filter at slot size, much cheaper than at full resolution
+            if filters and filter_engine and i < len(filters):
+                img_resized = filter_engine.apply(img_resized, filters[i])
+            
             # Calculate actual dimensions we can paste (clip to canvas boundaries)
             paste_height = min(height, self._page_height - y, img_resized.shape[0])
             paste_width = min(width, self._page_width - x, img_resized.shape[1])
@@ -0,0 +1,108 @@
+import os
+import cv2
+import threading
+from kivy.logger import Logger
+
+class ThumbnailService:
+    """
+    Generate and cache downsized versions of session collages for the web gallery.
+    Thumbnails are stored outside the save directory so they are never exported.
+    """
+    WIDTHS = (320, 640, 1280)
+    FORMATS = {
+        'webp': ('image/webp', [cv2.IMWRITE_WEBP_QUALITY, 80]),
+        'jpg': ('image/jpeg', [cv2.IMWRITE_JPEG_QUALITY, 85]),
+    }
+    SOURCE = 'collage.jpg'
+    # Generations are serialized per session through a fixed set of locks, shared by sessions with the same hash
+    LOCK_STRIPES = 16
+
+    def __init__(self, session_index, cache_directory):
+        """
+        Args:
+            session_index: SessionIndex used to locate collages
+            cache_directory: Directory where thumbnails are stored
+        """
+        self._index = session_index
+        self._cache_directory = cache_directory
+        self._locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+        os.makedirs(cache_directory, exist_ok=True)
+
+    @classmethod
+    def get_mimetype(cls, fmt):
+        return cls.FORMATS[fmt][0]
+
+    def get_path(self, session, width, fmt):
+        return os.path.join(self._cache_directory, session, f'collage_{width}.{fmt}')
+
+    def get(self, session, width, fmt):
+        """
+        Return the path of a thumbnail, generating it on first request.
+
+        Args:
+            session: Session identifier
+            width: One of WIDTHS
+            fmt: One of FORMATS
+
+        Returns:
+            Path to the thumbnail, or None if the session or size is unknown
+        """
+        if width not in self.WIDTHS or fmt not in self.FORMATS: return None
+        path = self.get_path(session, width, fmt)
+        if os.path.exists(path): return path
+        if self._index.get_file(session, self.SOURCE) is None: return None
+
+        # Concurrent requests for the same session wait for a single generation
+        with self._get_lock(session):
+            if not os.path.exists(path): self.generate(session)
+        return path if os.path.exists(path) else None
+
+    def generate(self, session):
+        """Generate every size and format of a session's collage from a single decode."""
+        source = self._index.get_path(session, self.SOURCE)
+        info = self._index.get_file(session, self.SOURCE)
+        # Let libjpeg decode at a reduced scale when the largest thumbnail allows it
+        flags = cv2.IMREAD_COLOR
+        if info and info['width']:
+            for reduced, factor in ((cv2.IMREAD_REDUCED_COLOR_4, 4), (cv2.IMREAD_REDUCED_COLOR_2, 2)):
+                if info['width'] // factor >= max(self.WIDTHS):
+                    flags = reduced
+                    break
+        img = cv2.imread(source, flags)
+        if img is None:
+            Logger.warning(f'ThumbnailService: Cannot read {source}')
+            return
+
+        os.makedirs(os.path.join(self._cache_directory, session), exist_ok=True)
+        for width in sorted(self.WIDTHS, reverse=True):
+            if img.shape[1] > width:
+                img = cv2.resize(img, (width, int(img.shape[0] * width / img.shape[1])), interpolation=cv2.INTER_AREA)
+            for fmt, (_, params) in self.FORMATS.items():
+                path = self.get_path(session, width, fmt)
+                ok, data = cv2.imencode(f'.{fmt}', img, params)
+                if not ok: continue
+                tmp = path + '.tmp'
+                with open(tmp, 'wb') as f:
+                    f.write(data.tobytes())
+                os.replace(tmp, path)
+        Logger.info(f'ThumbnailService: Generated thumbnails for {session}')
+
+    def generate_async(self, session, on_done=None):
+        """
+        Generate thumbnails in a background thread (used when a session is saved).
+
+        Args:
+            session: Session identifier
+            on_done: Optional callback receiving the session once the thumbnails are ready
+        """
+        def run():
+            with self._get_lock(session):
+                try:
+                    self.generate(session)
+                except Exception as e:
+                    Logger.error(f'ThumbnailService: Error generating thumbnails for {session}: {e}')
+            if on_done: on_done(session)
+        threading.Thread(name='_thumbnails', target=run, daemon=True).start()
+
+    def _get_lock(self, session):
+        return self._locks[hash(session) % self.LOCK_STRIPES]
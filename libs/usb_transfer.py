@@ -5,15 +5,32 @@ import shutil
 from pathlib import Path
 
 from threading import Event, Thread
+from kivy.clock import mainthread
 from kivy.logger import Logger
 
 from libs.screens import ScreenMgr
+from libs.archive import SessionArchiver
+from libs.copy_engine import CopyEngine
+from libs.export_profile import ExportProfile
 
 class UsbTransfer:
-    def __init__(self, app, folder):
+    def __init__(self, app, folder, index, profile=None, background=False, max_rate=None):
+        """
+        Args:
+            app: Photobooth application
+            folder: Directory to export
+            index: SessionIndex of the directory to export
+            profile: ExportProfile selecting what to export
+            background: If True, export without leaving the current screen, at low priority
+            max_rate: Optional bandwidth limit in bytes per second for background exports
+        """
         Logger.info('UsbTransfer: __init__().')
         self._app = app
         self._folder = folder
+        self._index = index
+        self._profile = profile or ExportProfile()
+        self._background = background
+        self._max_rate = max_rate
         self._worker_thread: Thread = None
         self._stop_event = Event()
 
@@ -48,19 +65,22 @@ class UsbTransfer:
         Logger.info("UsbTransfer: handle_mount({})".format(device.device))
 
         if device.mountpoint:
-            self._app.request_transition_to(ScreenMgr.COPYING)
+            if not self._background: self._show_screen(ScreenMgr.COPYING)
             try:
-                self.copy_without_overwrite(self._folder, device.mountpoint)
+                self.export_to(device.mountpoint)
                 #self.copy_folders_to_usb(device.mountpoint)
+                if self._background: self._show_background_status({'done': True})
             except:
                 Logger.error('UsbTransfer: Failed to perform folder copy.')
+                if self._background: self._show_background_status({'error': True})
             finally:
-                self._app.request_transition_to(ScreenMgr.WAITING)
+                if not self._background: self._show_screen(ScreenMgr.WAITING)
         else:
             Logger.error("USB device {} not correctly mounted".format(device.device))
 
     def handle_unmount(self, device: psutil._common.sdiskpart):
         Logger.info("UsbTransfer: handle_unmount({})".format(device.device))
+        if self._background: self._show_background_status({})
 
     @staticmethod
     def get_current_removable_media():
@@ -82,19 +102,72 @@ class UsbTransfer:
             Logger.warning("UsbTransfer: Cannot copy files to USB drive")
             return
 
-    def copy_without_overwrite(self, src, dest):
-        src_path = Path(src)
-        dest_path = Path(dest)
-
-        if not src_path.exists(): raise ValueError("Source directory does not exist")
-        dest_path.mkdir(parents=True, exist_ok=True)
-
-        for item in src_path.iterdir():
-            s = src_path / item.name
-            d = dest_path / item.name
-            if s.is_dir():
-                self.copy_without_overwrite(s, d)
-            else:
-                if not d.exists():
-                    self._app.sm.current_screen.on_update({'label' : item.name})
-                    shutil.copy2(s, d)
+    def export_to(self, mountpoint):
+        """Export the sessions selected by the drive's profile to a mount point."""
+        profile = self._profile.for_drive(mountpoint)
+        last_export = profile.read_last_export(mountpoint)
+        if profile.archive:
+            sessions = self.archive_to(profile, mountpoint, last_export)
+        else:
+            sessions = self.copy_to(profile, mountpoint, last_export)
+        if sessions and (last_export is None or sessions[-1] > last_export):
+            profile.write_last_export(mountpoint, sessions[-1])
+
+    def copy_to(self, profile, mountpoint, last_export=None):
+        """Copy the selected sessions file by file, skipping files already on the drive."""
+        jobs, sessions = self.list_export_files(profile, mountpoint, last_export)
+        Logger.info(f'UsbTransfer: Exporting {len(sessions)} sessions ({len(jobs)} files) with {profile}')
+
+        if self._background:
+            engine = CopyEngine(on_progress=self._show_background_status, max_workers=1, max_rate=self._max_rate, low_priority=True)
+        else:
+            engine = CopyEngine(on_progress=self._on_progress)
+        engine.copy(jobs)
+        return sessions
+
+    def archive_to(self, profile, mountpoint, last_export=None):
+        """Write the selected sessions as a single ZIP archive on the drive."""
+        sessions, files = profile.list_files(self._index, last_export)
+        if not files: return sessions
+        Logger.info(f'UsbTransfer: Archiving {len(sessions)} sessions ({len(files)} files) with {profile}')
+        on_progress = self._show_background_status if self._background else self._on_progress
+        path = os.path.join(mountpoint, 'photobooth_{}.zip'.format(time.strftime('%Y%m%d_%H%M%S')))
+        SessionArchiver(files).write_to(path, on_progress=on_progress)
+        return sessions
+
+    def list_export_files(self, profile, dest, last_export=None):
+        """
+        Build the list of files to export according to a profile.
+
+        Args:
+            profile: ExportProfile selecting sessions and files
+            dest: Destination folder
+            last_export: Last session exported to this destination
+
+        Returns:
+            Tuple (list of (source, destination) tuples, list of selected sessions)
+        """
+        sessions, files = profile.list_files(self._index, last_export)
+
+        jobs = []
+        for session, filename, path in files:
+            dest_dir = Path(dest, session)
+            d = dest_dir / filename
+            if d.exists(): continue
+            dest_dir.mkdir(parents=True, exist_ok=True)
+            jobs.append((path, str(d)))
+        return jobs, sessions
+
+    # Screen updates are marshalled onto the Kivy main thread
+
+    @mainthread
+    def _show_screen(self, screen):
+        self._app.request_transition_to(screen)
+
+    @mainthread
+    def _on_progress(self, progress):
+        self._app.sm.current_screen.on_update(progress)
+
+    @mainthread
+    def _show_background_status(self, progress):
+        self._app.sm.get_screen(ScreenMgr.WAITING).on_update({'export': progress})
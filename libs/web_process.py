@@ -0,0 +1,189 @@
+import os
+import sys
+import json
+import time
+import signal
+import psutil
+import threading
+import subprocess
+import urllib.request
+from kivy.logger import Logger
+
+class WebServerProcess:
+    """
+    Run the WebServer in a child process at lower CPU and IO priority, so that guests browsing the
+    gallery never compete with the camera preview for the GIL. The child only shares the save directory
+    and the session index with the booth: it finds new sessions by polling the index.
+    The parent checks the child's health and restarts it when it dies or stops answering.
+    """
+    NICENESS = 10
+    HEALTH_INTERVAL = 5
+    HEALTH_TIMEOUT = 3
+    MAX_FAILURES = 3
+    RESTART_DELAY = 2
+    MAX_RESTART_DELAY = 60
+    STOP_TIMEOUT = 5
+
+    STARTING = 'starting'
+    RUNNING = 'running'
+    UNHEALTHY = 'unhealthy'
+    RESTARTING = 'restarting'
+    STOPPED = 'stopped'
+
+    def __init__(self, save_directory, db_path, cache_directory, on_status=None, niceness=NICENESS, **kwargs):
+        """
+        Args:
+            save_directory: Directory containing one sub-directory per session
+            db_path: Path to the session index database
+            cache_directory: Directory where thumbnails are stored
+            on_status: Optional callback receiving the server status (STARTING, RUNNING, ...), called from the monitor thread
+            niceness: Niceness added to the child process
+            kwargs: Other WebServer arguments (host, port, server, threads...)
+        """
+        self._options = dict(kwargs, save_directory=save_directory, db_path=db_path, cache_directory=cache_directory, niceness=niceness)
+        self._port = kwargs.get('port', 5000)
+        self._on_status = on_status
+        self._process = None
+        self._status = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def get_status(self):
+        return self._status
+
+    def start(self):
+        """Start the child process and its monitor thread."""
+        if self._thread and self._thread.is_alive():
+            Logger.warning('WebServerProcess: Already running')
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(name='_web_monitor', target=self._monitor, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop monitoring and terminate the child (it flushes its statistics on SIGTERM)."""
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join()
+        self._terminate()
+        self._set_status(self.STOPPED)
+
+    def notify_new_session(self, session):
+        """New sessions are found by the child when it polls the session index."""
+        pass
+
+    def _spawn(self):
+        # A fresh interpreter rather than multiprocessing: forking or re-importing the Kivy app is not wanted
+        root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+        env = dict(os.environ, KIVY_NO_ARGS='1')
+        self._process = subprocess.Popen([sys.executable, '-m', 'libs.web_process', json.dumps(self._options)], cwd=root, env=env)
+        Logger.info(f'WebServerProcess: Started child process {self._process.pid}')
+
+    def _terminate(self):
+        if self._process is None or self._process.poll() is not None: return
+        self._process.terminate()
+        try:
+            self._process.wait(self.STOP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            Logger.warning('WebServerProcess: Child did not stop, killing it')
+            self._process.kill()
+            self._process.wait()
+
+    def _is_healthy(self):
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{self._port}/health', timeout=self.HEALTH_TIMEOUT) as response:
+                return response.status == 200
+        except Exception:
+            return False
+
+    def _monitor(self):
+        delay = self.RESTART_DELAY
+        self._set_status(self.STARTING)
+        self._spawn()
+        failures = 0
+        started = time.monotonic()
+        while not self._stop_event.wait(self.HEALTH_INTERVAL):
+            if self._process.poll() is None and self._is_healthy():
+                failures = 0
+                self._set_status(self.RUNNING)
+                # Reset the back-off once the child has been stable for a while
+                if time.monotonic() - started > self.MAX_RESTART_DELAY: delay = self.RESTART_DELAY
+                continue
+
+            if self._process.poll() is None:
+                failures += 1
+                Logger.warning(f'WebServerProcess: Health check failed ({failures}/{self.MAX_FAILURES})')
+                # Give a starting child a few chances to bind its port
+                if failures < self.MAX_FAILURES:
+                    if self._status != self.STARTING: self._set_status(self.UNHEALTHY)
+                    continue
+            else:
+                Logger.error(f'WebServerProcess: Child exited with code {self._process.returncode}')
+
+            self._set_status(self.RESTARTING)
+            self._terminate()
+            if self._stop_event.wait(delay): break
+            delay = min(delay * 2, self.MAX_RESTART_DELAY)
+            failures = 0
+            started = time.monotonic()
+            self._set_status(self.STARTING)
+            self._spawn()
+
+    def _set_status(self, status):
+        if status == self._status: return
+        self._status = status
+        Logger.info(f'WebServerProcess: Status {status}')
+        if self._on_status:
+            try:
+                self._on_status(status)
+            except Exception as e:
+                Logger.error(f'WebServerProcess: Status callback failed: {e}')
+
+def _lower_priority(niceness):
+    """Lower CPU and IO priority of the process (before any thread is started, threads inherit them)."""
+    try:
+        os.nice(niceness)
+    except OSError as e:
+        Logger.warning(f'WebServerProcess: Cannot lower CPU priority: {e}')
+    try:
+        psutil.Process().ionice(psutil.IOPRIO_CLASS_BE, 7)
+    except (AttributeError, psutil.Error, OSError) as e:
+        Logger.warning(f'WebServerProcess: Cannot lower IO priority: {e}')
+
+def _watch_sessions(session_index, web_server, stop_event, interval=1):
+    """Announce the sessions saved by the booth since the last poll of the index, until stopped or orphaned."""
+    parent = os.getppid()
+    latest = session_index.get_latest()
+    while not stop_event.wait(interval):
+        # Do not keep the port busy once the booth is gone
+        if os.getppid() != parent: break
+        try:
+            sessions = [row['id'] for row in session_index.list_sessions(limit=16) if latest is None or row['id'] > latest]
+        except Exception as e:
+            Logger.error(f'WebServerProcess: Cannot read the session index: {e}')
+            continue
+        for session in reversed(sessions):
+            web_server.notify_new_session(session)
+        if sessions: latest = sessions[0]
+
+def main(options):
+    from libs.session_index import SessionIndex
+    from libs.web_server import WebServer
+
+    _lower_priority(options.pop('niceness'))
+    save_directory = options.pop('save_directory')
+    cache_directory = options.pop('cache_directory')
+    session_index = SessionIndex(options.pop('db_path'), save_directory)
+    web_server = WebServer(save_directory, session_index, cache_directory, **options)
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    web_server.start()
+    try:
+        _watch_sessions(session_index, web_server, stop_event)
+    except KeyboardInterrupt:
+        pass
+    web_server.stop()
+
+if __name__ == '__main__':
+    main(json.loads(sys.argv[1]))
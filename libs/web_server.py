@@ -1,99 +1,287 @@
+import io
 import os
 import json
+import time
+import hashlib
+import logging
 import threading
-from datetime import datetime
-from flask import Flask, send_file, render_template_string, redirect
+from collections import deque
+from flask import Flask, Response, send_file, render_template, redirect, request, jsonify
 from kivy.logger import Logger
 
+try:
+    from waitress import create_server
+except ImportError:
+    create_server = None
+
+from libs.archive import SessionArchiver
+from libs.export_profile import ExportProfile
+from libs.rate_limit import RateLimiter
+from libs.stats import StatsAggregator
+from libs.thumbnails import ThumbnailService
+
+# Page templates and static files of the gallery
+WEB_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'assets', 'web')
+
+class _ReleasingFile(io.FileIO):
+    """Read-only file calling a function once closed, i.e. when the server has sent it or the client is gone."""
+    
+    def __init__(self, path, on_close):
+        super().__init__(path, 'rb')
+        self._on_close = on_close
+    
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._on_close()
+
 class WebServer:
     """Flask web server for photo gallery with captive portal."""
     
-    def __init__(self, save_directory, host='0.0.0.0', port=5000):
+    # Session files are never modified once saved
+    CACHE_CONTROL = 'public, max-age=31536000, immutable'
+    
+    # Gallery pagination
+    PAGE_SIZE = 24
+    MAX_PAGE_SIZE = 100
+    
+    # Default production server settings (sized for a Raspberry Pi)
+    SERVER = 'waitress'
+    THREADS = 6
+    CONNECTION_LIMIT = 200
+    CHANNEL_TIMEOUT = 30
+    
+    # Server-sent events: each open stream holds one thread, waiting on a condition
+    EVENT_STREAMS = 24
+    EVENT_KEEPALIVE = 15
+    EVENT_STREAM_DURATION = 300
+    EVENT_HISTORY = 16
+    
+    # Admission control: per-client request rate and concurrent file downloads
+    RATE_LIMIT = 10
+    RATE_BURST = 40
+    MAX_DOWNLOADS = 4
+    # Images shown in pages are neither rate limited nor capped: browsers do not retry an <img> refused with 429 or 503
+    UNLIMITED_PATHS = ('/thumb/', '/image/', '/static/')
+    LATEST_TTL = 5
+    
+    # Captive portal detection URLs probed by phones every few seconds, answered before Flask
+    PROBE_PATHS = ('/generate_204', '/gen_204', '/hotspot-detect.html', '/library/test/success.html', '/connecttest.txt', '/redirect')
+    PROBE_RESPONSE = ('302 Found', [('Location', '/'), ('Content-Length', '0'), ('Cache-Control', 'no-store')])
+    
+    def __init__(self, save_directory, session_index, cache_directory, host='0.0.0.0', port=5000,
+                 server=SERVER, threads=THREADS, connection_limit=CONNECTION_LIMIT, event_streams=EVENT_STREAMS,
+                 rate_limit=RATE_LIMIT, rate_burst=RATE_BURST, max_downloads=MAX_DOWNLOADS):
+        """
+        Args:
+            save_directory: Directory containing one sub-directory per session
+            session_index: SessionIndex of the save directory
+            cache_directory: Directory where thumbnails are stored
+            host: Listening address
+            port: Listening port
+            server: 'waitress' (bounded thread pool) or 'flask' (development server)
+            threads: Number of worker threads of the waitress server
+            connection_limit: Maximum number of open connections, further clients wait in the listen backlog
+            event_streams: Maximum number of open /events streams (clients over the limit poll instead)
+            rate_limit: Requests per second allowed per client (0 disables rate limiting)
+            rate_burst: Requests a client may send at once
+            max_downloads: Maximum number of images and archives sent at the same time
+        """
         self.save_directory = save_directory
+        self.session_index = session_index
+        self.thumbnails = ThumbnailService(session_index, cache_directory)
         self.host = host
         self.port = port
-        self.app = Flask(__name__)
+        self.app = Flask(__name__,
+                         template_folder=os.path.join(WEB_DIRECTORY, 'templates'),
+                         static_folder=os.path.join(WEB_DIRECTORY, 'static'))
+        # Static URLs carry a content hash, so browsers can keep the files forever
+        self.app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 31536000
+        self.app.jinja_env.globals['static_url'] = self._get_static_url
+        self._static_versions = {}
+        self.server = server
+        self.threads = threads
+        self.connection_limit = connection_limit
+        self.event_streams = event_streams
+        self._event_condition = threading.Condition()
+        self._events = deque(maxlen=self.EVENT_HISTORY)
+        self._event_id = 0
+        self._open_streams = 0
+        self._stopping = False
+        self._rate_limiter = RateLimiter(rate_limit, rate_burst) if rate_limit > 0 else None
+        self._downloads = threading.BoundedSemaphore(max_downloads)
+        self._latest = (0, None)
         self.server_thread = None
+        self._wsgi_server = None
         self.stats_file = os.path.join(save_directory, '.stats.json')
-        self.stats_lock = threading.Lock()
+        self.stats = StatsAggregator(self.stats_file)
+        self._load_templates()
         self._setup_routes()
+        self._flask_wsgi_app = self.app.wsgi_app
+        self.app.wsgi_app = self._guard
     
-    def _load_stats(self):
-        """Load statistics from JSON file."""
-        try:
-            if os.path.exists(self.stats_file):
-                with open(self.stats_file, 'r') as f:
-                    return json.load(f)
-        except Exception as e:
-            Logger.error(f'WebServer: Error loading stats: {e}')
+    def _load_templates(self):
+        """Compile the page templates and hash the static files once at startup."""
+        for name in self.app.jinja_loader.list_templates():
+            self.app.jinja_env.get_template(name)
+        for name in os.listdir(self.app.static_folder):
+            with open(os.path.join(self.app.static_folder, name), 'rb') as f:
+                self._static_versions[name] = hashlib.md5(f.read()).hexdigest()[:8]
+    
+    def _get_static_url(self, filename):
+        return f'/static/{filename}?v={self._static_versions.get(filename, "")}'
+    
+    def _guard(self, environ, start_response):
+        """WSGI entry point: answer OS probes and rate limit clients before reaching Flask."""
+        path = environ.get('PATH_INFO', '')
+        if path in self.PROBE_PATHS:
+            status, headers = self.PROBE_RESPONSE
+            start_response(status, list(headers))
+            return [b'']
+        
+        if self._rate_limiter and not path.startswith(self.UNLIMITED_PATHS):
+            allowed, retry_after = self._rate_limiter.allow(environ.get('REMOTE_ADDR'))
+            if not allowed:
+                return self._refuse(start_response, '429 Too Many Requests', retry_after)
         
-        # Default stats structure
+        return self._flask_wsgi_app(environ, start_response)
+    
+    def _refuse(self, start_response, status, retry_after):
+        start_response(status, [('Retry-After', self._get_retry_after(retry_after)), ('Content-Type', 'text/plain'), ('Content-Length', '0')])
+        return [b'']
+    
+    def _get_retry_after(self, retry_after):
+        return str(max(1, int(retry_after + 0.999)))
+    
+    def _acquire_download(self):
+        """
+        Take one of the download slots, held until the whole response is sent.
+        
+        Returns:
+            Function releasing the slot (only the first call releases it), or None when every slot is taken
+        """
+        if not self._downloads.acquire(blocking=False): return None
+        once = threading.Lock()
+        def release():
+            if once.acquire(blocking=False): self._downloads.release()
+        return release
+    
+    def _downloads_busy(self):
+        return Response('Too many downloads', status=503, headers={'Retry-After': self._get_retry_after(2)})
+    
+    def _get_latest(self):
+        """Latest session, cached for a few seconds: '/' is where every captive portal lands."""
+        expires, latest = self._latest
+        if time.monotonic() < expires: return latest
+        latest = self.session_index.get_latest()
+        self._latest = (time.monotonic() + self.LATEST_TTL, latest)
+        return latest
+    
+    def _load_stats(self):
+        """Return a snapshot of the in-memory statistics."""
+        return self.stats.snapshot()
+    
+    def _track_event(self, event_type, session=None):
+        """Track an event in statistics (in memory, flushed to disk in the background)."""
+        if event_type == 'download':
+            self.stats.increment('downloads', date_key='last_download_date')
+        elif event_type == 'gallery_view':
+            self.stats.increment('gallery_views')
+        elif event_type == 'collage_view':
+            self.stats.increment('collage_views')
+        elif event_type == 'image_view':
+            self.stats.increment('image_views')
+    
+    def _get_etag(self, info):
+        """Strong ETag of an indexed file: session files never change once saved."""
+        return f'{info["size"]:x}-{int(info["mtime"] * 1000):x}'
+    
+    def _is_not_modified(self, etag, mtime):
+        """Return True if the client already holds this version (If-None-Match, then If-Modified-Since)."""
+        if request.if_none_match:
+            return request.if_none_match.contains(etag)
+        if request.if_modified_since and mtime:
+            return int(mtime) <= request.if_modified_since.timestamp()
+        return False
+    
+    def _not_modified(self, etag):
+        """Build a 304 response without touching the file nor the statistics."""
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = self.CACHE_CONTROL
+        return response
+    
+    def _send_cached_file(self, path_or_file, etag, mtime, **kwargs):
+        """Send a file with validators and a long-lived immutable cache policy."""
+        response = send_file(path_or_file, etag=etag, last_modified=mtime, conditional=False, **kwargs)
+        response.headers['Cache-Control'] = self.CACHE_CONTROL
+        return response
+    
+    def _get_srcset(self, session, fmt, max_width=None):
+        """Build the srcset attribute listing the thumbnail widths of a session (smaller than max_width)."""
+        widths = [width for width in ThumbnailService.WIDTHS if not max_width or width < max_width]
+        return ', '.join(f'/thumb/{session}/{width}.{fmt} {width}w' for width in widths)
+    
+    def _get_session_entry(self, row):
+        """Describe an indexed session for the gallery pages and the JSON API."""
         return {
-            'photos_taken': 0,
-            'downloads': 0,
-            'gallery_views': 0,
-            'collage_views': 0,
-            'image_views': 0,
-            'first_photo_date': None,
-            'last_photo_date': None,
-            'last_download_date': None,
-            'sessions': []
+            'id': row['id'],
+            'timestamp': row['timestamp'],
+            'url': f'/collage/{row["id"]}',
+            'download': f'/download/{row["id"]}/collage.jpg',
+            'thumbnail': f'/thumb/{row["id"]}/640.jpg',
+            'srcset': {fmt: self._get_srcset(row['id'], fmt) for fmt in ThumbnailService.FORMATS},
         }
     
-    def _save_stats(self, stats):
-        """Save statistics to JSON file."""
-        try:
-            with self.stats_lock:
-                with open(self.stats_file, 'w') as f:
-                    json.dump(stats, f, indent=2)
-        except Exception as e:
-            Logger.error(f'WebServer: Error saving stats: {e}')
+    def _publish_session(self, session):
+        """Push a new session to the clients connected to /events."""
+        row = self.session_index.get_session(session)
+        if row is None or not row['has_collage']: return
+        data = json.dumps(self._get_session_entry(row))
+        self._latest = (0, None)
+        with self._event_condition:
+            self._event_id += 1
+            self._events.append((self._event_id, data))
+            self._event_condition.notify_all()
+        Logger.info(f'WebServer: Published session {session} to {self._open_streams} clients')
     
-    def _track_event(self, event_type, session=None):
-        """Track an event in statistics."""
-        try:
-            stats = self._load_stats()
-            
-            if event_type == 'download':
-                stats['downloads'] += 1
-                stats['last_download_date'] = datetime.now().isoformat()
-            elif event_type == 'gallery_view':
-                stats['gallery_views'] += 1
-            elif event_type == 'collage_view':
-                stats['collage_views'] += 1
-            elif event_type == 'image_view':
-                stats['image_views'] += 1
-            
-            self._save_stats(stats)
-        except Exception as e:
-            Logger.error(f'WebServer: Error tracking event: {e}')
+    def _stream_events(self, last_id):
+        """Yield server-sent events until the stream duration is reached (browsers reconnect by themselves)."""
+        yield f'retry: {self.EVENT_KEEPALIVE * 1000}\n\n'
+        deadline = time.monotonic() + self.EVENT_STREAM_DURATION
+        while not self._stopping and time.monotonic() < deadline:
+            with self._event_condition:
+                self._event_condition.wait_for(lambda: self._event_id > last_id or self._stopping, timeout=self.EVENT_KEEPALIVE)
+                events = [event for event in self._events if event[0] > last_id]
+            if not events:
+                # Keep the connection alive through proxies and detect gone clients
+                yield ': keepalive\n\n'
+                continue
+            for event_id, data in events:
+                yield f'id: {event_id}\nevent: session\ndata: {data}\n\n'
+                last_id = event_id
     
-    def _get_all_collages(self):
-        """Get all collage files sorted by date (newest first)."""
-        collages = []
-        try:
-            if not os.path.exists(self.save_directory):
-                return collages
-            
-            # List all subdirectories (sessions)
-            for session_dir in sorted(os.listdir(self.save_directory), reverse=True):
-                session_path = os.path.join(self.save_directory, session_dir)
-                if not os.path.isdir(session_path):
-                    continue
-                
-                # Find collage in this session
-                for filename in os.listdir(session_path):
-                    if filename == 'collage.jpg':
-                        collages.append({
-                            'session': session_dir,
-                            'path': os.path.join(session_path, filename),
-                            'filename': filename
-                        })
-                        break
-        except Exception as e:
-            Logger.error(f'WebServer: Error getting collages: {e}')
+    def _release_stream(self):
+        with self._event_condition:
+            self._open_streams -= 1
+    
+    def _get_sessions_page(self, cursor, limit):
+        """
+        Return a page of sessions with a collage, newest first (keyset pagination on the session id).
+        
+        Args:
+            cursor: Identifier of the last session of the previous page, or None for the first page
+            limit: Maximum number of sessions
         
-        return collages
+        Returns:
+            Dict with the sessions and the cursor of the next page (None on the last page)
+        """
+        # Fetch one extra row to know whether another page exists
+        rows = self.session_index.list_sessions(before=cursor, limit=limit + 1)
+        sessions = [self._get_session_entry(row) for row in rows[:limit]]
+        next_cursor = sessions[-1]['id'] if len(rows) > limit else None
+        return {'sessions': sessions, 'next_cursor': next_cursor}
     
     def _setup_routes(self):
         """Setup Flask routes."""
@@ -101,429 +289,168 @@ class WebServer:
         @self.app.route('/')
         def index():
             """Main page - show gallery."""
-            collages = self._get_all_collages()
+            latest = self._get_latest()
             
-            if not collages:
+            if latest is None:
                 # No collages available
-                html = """
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <meta charset="UTF-8">
-                    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                    <title>PhotoBooth</title>
-                    <style>
-                        * { margin: 0; padding: 0; box-sizing: border-box; }
-                        body {
-                            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Arial, sans-serif;
-                            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                            min-height: 100vh;
-                            display: flex;
-                            align-items: center;
-                            justify-content: center;
-                        }
-                        .container {
-                            background: white;
-                            border-radius: 20px;
-                            padding: 60px;
-                            text-align: center;
-                            box-shadow: 0 20px 60px rgba(0,0,0,0.3);
-                        }
-                        .icon { font-size: 100px; margin-bottom: 20px; }
-                    </style>
-                </head>
-                <body>
-                    <div class="container">
-                        <div class="icon">📸</div>
-                    </div>
-                </body>
-                </html>
-                """
-                return render_template_string(html)
+                return render_template('empty.html')
             
             # Redirect to latest collage
-            latest = collages[0]
-            return redirect(f'/collage/{latest["session"]}')
+            return redirect(f'/collage/{latest}')
         
         @self.app.route('/gallery')
         def gallery():
-            """Gallery view with all collages."""
+            """Gallery view: the first page of collages, following pages are loaded on scroll."""
             self._track_event('gallery_view')
-            collages = self._get_all_collages()
-            
-            html = """
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <title>PhotoBooth</title>
-                <style>
-                    * { margin: 0; padding: 0; box-sizing: border-box; }
-                    body {
-                        font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Arial, sans-serif;
-                        background: #1a1a1a;
-                        min-height: 100vh;
-                        padding: 20px;
-                    }
-                    .gallery {
-                        display: grid;
-                        grid-template-columns: repeat(auto-fill, minmax(300px, 1fr));
-                        gap: 20px;
-                        max-width: 1400px;
-                        margin: 0 auto;
-                    }
-                    .card {
-                        background: white;
-                        border-radius: 15px;
-                        overflow: hidden;
-                        box-shadow: 0 5px 15px rgba(0,0,0,0.3);
-                        transition: transform 0.3s;
-                        cursor: pointer;
-                    }
-                    .card:hover { transform: translateY(-5px); }
-                    .card img {
-                        width: 100%;
-                        height: 300px;
-                        object-fit: cover;
-                        display: block;
-                    }
-                    .card-footer {
-                        padding: 15px;
-                        text-align: center;
-                    }
-                    .btn {
-                        display: inline-block;
-                        padding: 12px 30px;
-                        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                        color: white;
-                        text-decoration: none;
-                        border-radius: 8px;
-                        font-weight: bold;
-                        transition: opacity 0.3s;
-                    }
-                    .btn:hover { opacity: 0.9; }
-                    @media (max-width: 600px) {
-                        .gallery { grid-template-columns: 1fr; }
-                    }
-                </style>
-            </head>
-            <body>
-                <div class="gallery">
-            """
-            
-            for collage in collages:
-                html += f"""
-                    <div class="card" onclick="window.location='/collage/{collage["session"]}'">
-                        <img src="/image/{collage["session"]}/collage.jpg" alt="📸">
-                        <div class="card-footer">
-                            <a href="/download/{collage["session"]}/collage.jpg" class="btn">⬇️</a>
-                        </div>
-                    </div>
-                """
-            
-            html += """
-                </div>
-            </body>
-            </html>
-            """
-            
-            return render_template_string(html)
+            page = self._get_sessions_page(None, self.PAGE_SIZE)
+            latest = page['sessions'][0]['id'] if page['sessions'] else None
+            return render_template('gallery.html', page=page, page_size=self.PAGE_SIZE, latest=latest)
+        
+        @self.app.route('/api/sessions')
+        def api_sessions():
+            """JSON list of sessions, newest first, paginated with the cursor of the previous page."""
+            cursor = request.args.get('cursor') or None
+            limit = request.args.get('limit', self.PAGE_SIZE, type=int)
+            return jsonify(self._get_sessions_page(cursor, max(1, min(limit, self.MAX_PAGE_SIZE))))
         
         @self.app.route('/collage/<session>')
         def view_collage(session):
             """View a single collage fullscreen."""
-            collage_path = os.path.join(self.save_directory, session, 'collage.jpg')
-            
-            if not os.path.exists(collage_path):
+            collage = self.session_index.get_file(session, 'collage.jpg')
+            if collage is None:
                 return redirect('/')
             
             self._track_event('collage_view', session)
             
-            html = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <title>PhotoBooth</title>
-                <style>
-                    * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-                    body {{
-                        background: #000;
-                        min-height: 100vh;
-                        display: flex;
-                        flex-direction: column;
-                        align-items: center;
-                        justify-content: center;
-                        padding: 20px;
-                    }}
-                    img {{
-                        max-width: 100%;
-                        max-height: 80vh;
-                        object-fit: contain;
-                        box-shadow: 0 10px 40px rgba(0,0,0,0.5);
-                        border-radius: 10px;
-                    }}
-                    .controls {{
-                        margin-top: 30px;
-                        display: flex;
-                        gap: 20px;
-                    }}
-                    .btn {{
-                        padding: 15px 40px;
-                        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                        color: white;
-                        text-decoration: none;
-                        border-radius: 30px;
-                        font-weight: bold;
-                        font-size: 18px;
-                        transition: transform 0.2s;
-                        box-shadow: 0 5px 20px rgba(102, 126, 234, 0.4);
-                    }}
-                    .btn:hover {{
-                        transform: scale(1.05);
-                    }}
-                    .btn-secondary {{
-                        background: rgba(255,255,255,0.1);
-                        box-shadow: none;
-                    }}
-                </style>
-            </head>
-            <body>
-                <img src="/image/{session}/collage.jpg" alt="📸">
-                <div class="controls">
-                    <a href="/gallery" class="btn btn-secondary">🖼️</a>
-                    <a href="/download/{session}/collage.jpg" class="btn">⬇️</a>
-                </div>
-            </body>
-            </html>
-            """
+            srcset = {fmt: self._get_srcset(session, fmt, collage['width']) for fmt in ThumbnailService.FORMATS}
+            # The full size collage is the largest candidate (the only one when it is narrower than every thumbnail)
+            original = f'/image/{session}/collage.jpg {collage["width"] or 4000}w'
+            srcset['jpg'] = ', '.join(filter(None, [srcset['jpg'], original]))
+            return render_template('collage.html', session=session, srcset=srcset, latest=self.session_index.get_latest())
+        
+        @self.app.route('/c')
+        @self.app.route('/c/<code>')
+        def session_code(code=None):
+            """Open the collage of a session from the short code shown on the booth."""
+            session = self.session_index.get_session_by_code(code or request.args.get('code', ''))
+            if session is None:
+                return redirect('/gallery')
+            return redirect(f'/collage/{session}')
+        
+        @self.app.route('/events')
+        def events():
+            """Server-sent events announcing new sessions."""
+            with self._event_condition:
+                if self._stopping or self._open_streams >= self.event_streams:
+                    # Clients fall back to polling /api/sessions
+                    return Response('Too many streams', status=503, headers={'Retry-After': str(self.EVENT_KEEPALIVE)})
+                self._open_streams += 1
+                # Resume after the last event received by a reconnecting client (ids restart with the server)
+                last_id = request.headers.get('Last-Event-ID', self._event_id, type=int)
+                if last_id > self._event_id: last_id = self._event_id
             
-            return render_template_string(html)
+            response = Response(self._stream_events(last_id), mimetype='text/event-stream',
+                                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+            response.call_on_close(self._release_stream)
+            return response
         
         @self.app.route('/image/<session>/<filename>')
         def serve_image(session, filename):
             """Serve an image file."""
-            image_path = os.path.join(self.save_directory, session, filename)
+            info = self.session_index.get_file(session, filename)
+            if info is None:
+                return "Not found", 404
+            
+            etag = self._get_etag(info)
+            if self._is_not_modified(etag, info['mtime']):
+                return self._not_modified(etag)
+            
+            self._track_event('image_view', session)
+            return self._send_cached_file(self.session_index.get_path(session, filename), etag, info['mtime'], mimetype='image/jpeg')
+        
+        @self.app.route('/thumb/<session>/<int:width>.<fmt>')
+        def serve_thumbnail(session, width, fmt):
+            """Serve a downsized collage (generated and cached on first request)."""
+            info = self.session_index.get_file(session, ThumbnailService.SOURCE)
+            if info is None:
+                return "Not found", 404
             
-            if not os.path.exists(image_path):
+            # Thumbnails are derived from the collage: reuse its validators
+            etag = f'{self._get_etag(info)}-{width}.{fmt}'
+            if self._is_not_modified(etag, info['mtime']):
+                return self._not_modified(etag)
+            
+            thumbnail_path = self.thumbnails.get(session, width, fmt)
+            if thumbnail_path is None:
                 return "Not found", 404
             
             self._track_event('image_view', session)
-            return send_file(image_path, mimetype='image/jpeg')
+            return self._send_cached_file(thumbnail_path, etag, info['mtime'], mimetype=ThumbnailService.get_mimetype(fmt))
         
         @self.app.route('/download/<session>/<filename>')
         def download_image(session, filename):
             """Download an image file."""
-            image_path = os.path.join(self.save_directory, session, filename)
-            
-            if not os.path.exists(image_path):
+            info = self.session_index.get_file(session, filename)
+            if info is None:
                 return "Not found", 404
             
+            etag = self._get_etag(info)
+            if self._is_not_modified(etag, info['mtime']):
+                return self._not_modified(etag)
+            
+            release = self._acquire_download()
+            if release is None:
+                return self._downloads_busy()
             self._track_event('download', session)
-            return send_file(
-                image_path,
-                mimetype='image/jpeg',
-                as_attachment=True,
-                download_name=f'photobooth_{session}.jpg'
+            try:
+                # The server sends the file itself (wsgi.file_wrapper) and only closes the file once done
+                response = self._send_cached_file(
+                    _ReleasingFile(self.session_index.get_path(session, filename), release),
+                    etag,
+                    info['mtime'],
+                    mimetype='image/jpeg',
+                    as_attachment=True,
+                    download_name=f'photobooth_{session}.jpg'
+                )
+            except Exception:
+                release()
+                raise
+            response.call_on_close(release)
+            return response
+        
+        @self.app.route('/archive.zip')
+        def download_archive():
+            """Stream sessions as a ZIP archive, filtered with content, from, to and since arguments."""
+            profile, since = ExportProfile.from_args(request.args)
+            _, files = profile.list_files(self.session_index, since)
+
+            release = self._acquire_download()
+            if release is None:
+                return self._downloads_busy()
+            self._track_event('download')
+            response = Response(
+                SessionArchiver(files).iter_chunks(),
+                mimetype='application/zip',
+                headers={'Content-Disposition': 'attachment; filename=photobooth.zip'}
             )
+            response.call_on_close(release)
+            return response
+        
+        @self.app.route('/health')
+        def health():
+            """Health check used when the server runs in a separate process."""
+            return jsonify(status='ok', sessions=self.session_index.count())
         
         @self.app.route('/stats')
         def statistics():
             """Hidden statistics page - shows usage analytics."""
             stats = self._load_stats()
-            collages = self._get_all_collages()
+            total_sessions = self.session_index.count()
             
             # Calculate photos taken from number of sessions
-            stats['photos_taken'] = len(collages)
+            stats['photos_taken'] = total_sessions
             
-            html = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <title>PhotoBooth - Statistiques</title>
-                <style>
-                    * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-                    body {{
-                        font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Arial, sans-serif;
-                        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                        min-height: 100vh;
-                        padding: 40px 20px;
-                    }}
-                    .container {{
-                        max-width: 1200px;
-                        margin: 0 auto;
-                    }}
-                    h1 {{
-                        color: white;
-                        text-align: center;
-                        margin-bottom: 40px;
-                        font-size: 42px;
-                        text-shadow: 0 2px 10px rgba(0,0,0,0.2);
-                    }}
-                    .stats-grid {{
-                        display: grid;
-                        grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-                        gap: 20px;
-                        margin-bottom: 40px;
-                    }}
-                    .stat-card {{
-                        background: white;
-                        border-radius: 15px;
-                        padding: 30px;
-                        box-shadow: 0 10px 30px rgba(0,0,0,0.2);
-                        transition: transform 0.3s;
-                    }}
-                    .stat-card:hover {{
-                        transform: translateY(-5px);
-                    }}
-                    .stat-icon {{
-                        font-size: 48px;
-                        margin-bottom: 15px;
-                    }}
-                    .stat-value {{
-                        font-size: 42px;
-                        font-weight: bold;
-                        color: #667eea;
-                        margin-bottom: 5px;
-                    }}
-                    .stat-label {{
-                        font-size: 16px;
-                        color: #666;
-                        text-transform: uppercase;
-                        letter-spacing: 1px;
-                    }}
-                    .stat-description {{
-                        font-size: 12px;
-                        color: #999;
-                        margin-top: 8px;
-                        line-height: 1.4;
-                    }}
-                    .info-card {{
-                        background: white;
-                        border-radius: 15px;
-                        padding: 30px;
-                        box-shadow: 0 10px 30px rgba(0,0,0,0.2);
-                    }}
-                    .info-row {{
-                        display: flex;
-                        justify-content: space-between;
-                        padding: 15px 0;
-                        border-bottom: 1px solid #eee;
-                    }}
-                    .info-row:last-child {{
-                        border-bottom: none;
-                    }}
-                    .info-label {{
-                        font-weight: bold;
-                        color: #333;
-                    }}
-                    .info-value {{
-                        color: #667eea;
-                    }}
-                    .back-btn {{
-                        display: inline-block;
-                        margin-top: 30px;
-                        padding: 15px 40px;
-                        background: white;
-                        color: #667eea;
-                        text-decoration: none;
-                        border-radius: 30px;
-                        font-weight: bold;
-                        box-shadow: 0 5px 20px rgba(0,0,0,0.2);
-                        transition: transform 0.2s;
-                    }}
-                    .back-btn:hover {{
-                        transform: scale(1.05);
-                    }}
-                    @media (max-width: 768px) {{
-                        .stats-grid {{
-                            grid-template-columns: 1fr;
-                        }}
-                        h1 {{
-                            font-size: 32px;
-                        }}
-                    }}
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <h1>📊 PhotoBooth Statistics</h1>
-                    
-                    <div class="stats-grid">
-                        <div class="stat-card">
-                            <div class="stat-icon">📸</div>
-                            <div class="stat-value">{stats['photos_taken']}</div>
-                            <div class="stat-label">Photos Taken</div>
-                            <div class="stat-description">Total collages created</div>
-                        </div>
-                        
-                        <div class="stat-card">
-                            <div class="stat-icon">⬇️</div>
-                            <div class="stat-value">{stats['downloads']}</div>
-                            <div class="stat-label">Downloads</div>
-                            <div class="stat-description">Files downloaded by users</div>
-                        </div>
-                        
-                        <div class="stat-card">
-                            <div class="stat-icon">🖼️</div>
-                            <div class="stat-value">{stats['gallery_views']}</div>
-                            <div class="stat-label">Gallery Views</div>
-                            <div class="stat-description">Grid view page visits</div>
-                        </div>
-                        
-                        <div class="stat-card">
-                            <div class="stat-icon">👁️</div>
-                            <div class="stat-value">{stats['collage_views']}</div>
-                            <div class="stat-label">Collage Views</div>
-                            <div class="stat-description">Full-screen collage page visits</div>
-                        </div>
-                    </div>
-                    
-                    <div class="info-card">
-                        <h2 style="margin-bottom: 20px; color: #667eea;">Additional Information</h2>
-                        <div class="info-row">
-                            <span class="info-label">Last Download:</span>
-                            <span class="info-value">{stats['last_download_date'] or 'None'}</span>
-                        </div>
-                        <div class="info-row">
-                            <span class="info-label">Total Sessions:</span>
-                            <span class="info-value">{len(collages)}</span>
-                        </div>
-                        <div class="info-row">
-                            <span class="info-label">Stats File:</span>
-                            <span class="info-value" style="font-size: 12px; word-break: break-all;">{self.stats_file}</span>
-                        </div>
-                    </div>
-                    
-                    <center>
-                        <a href="/gallery" class="back-btn">← Back to gallery</a>
-                    </center>
-                </div>
-            </body>
-            </html>
-            """
-            
-            return render_template_string(html)
-        
-        # Captive portal detection URLs
-        @self.app.route('/generate_204')
-        @self.app.route('/gen_204')
-        def android_captive():
-            return redirect('/')
-        
-        @self.app.route('/hotspot-detect.html')
-        @self.app.route('/library/test/success.html')
-        def apple_captive():
-            return redirect('/')
-        
-        @self.app.route('/connecttest.txt')
-        @self.app.route('/redirect')
-        def windows_captive():
-            return redirect('/')
+            return render_template('stats.html', stats=stats, total_sessions=total_sessions, stats_file=self.stats_file)
     
     def start(self):
         """Start the web server in a separate thread."""
@@ -531,36 +458,65 @@ class WebServer:
             Logger.warning('WebServer: Server already running')
             return
         
-        def run_server():
-            Logger.info(f'WebServer: Starting on {self.host}:{self.port}')
-            self.app.run(host=self.host, port=self.port, debug=False, threaded=True)
+        if self.server == 'waitress' and create_server is None:
+            Logger.warning('WebServer: waitress is not installed, falling back to the Flask development server')
         
+        if self.server == 'waitress' and create_server is not None:
+            # Fixed worker pool: slow clients are served by the I/O loop from the output buffer
+            # (files are streamed through wsgi.file_wrapper) so workers are released immediately,
+            # and connections over the limit wait in the listen backlog instead of spawning threads
+            self._wsgi_server = create_server(self.app, host=self.host, port=self.port,
+                                              # Event streams get their own threads so they never starve page requests
+                                              threads=self.threads + self.event_streams,
+                                              connection_limit=self.connection_limit,
+                                              backlog=self.connection_limit,
+                                              channel_timeout=self.CHANNEL_TIMEOUT,
+                                              ident='PhotoBooth')
+            # A queued burst is expected when guests scan the QR code together
+            logging.getLogger('waitress.queue').setLevel(logging.ERROR)
+            server = self._wsgi_server
+            
+            def run_server():
+                Logger.info(f'WebServer: Starting waitress on {self.host}:{self.port} ({self.threads} + {self.event_streams} threads)')
+                try:
+                    server.run()
+                except Exception as e:
+                    # Closing the sockets from stop() interrupts the loop
+                    if self._wsgi_server is server: Logger.error(f'WebServer: Server stopped: {e}')
+        else:
+            def run_server():
+                Logger.info(f'WebServer: Starting Flask development server on {self.host}:{self.port}')
+                self.app.run(host=self.host, port=self.port, debug=False, threaded=True)
+        
+        self.stats.start()
         self.server_thread = threading.Thread(target=run_server, daemon=True)
         self.server_thread.start()
         Logger.info('WebServer: Server started successfully')
     
+    def notify_new_session(self, session):
+        """Called when a session is saved: prepare its thumbnails in the background, then push it to the clients."""
+        self.thumbnails.generate_async(session, on_done=self._publish_session)
+    
     def track_photo_taken(self, session_id=None):
         """Public method to track when a photo is taken.
         
         Args:
             session_id: Optional session identifier for the photo
         """
-        try:
-            stats = self._load_stats()
-            stats['photos_taken'] += 1
-            stats['last_photo_date'] = datetime.now().isoformat()
-            
-            if stats['first_photo_date'] is None:
-                stats['first_photo_date'] = datetime.now().isoformat()
-            
-            if session_id and session_id not in stats['sessions']:
-                stats['sessions'].append(session_id)
-            
-            self._save_stats(stats)
-            Logger.info(f'WebServer: Photo tracked - Total: {stats["photos_taken"]}')
-        except Exception as e:
-            Logger.error(f'WebServer: Error tracking photo: {e}')
+        total = self.stats.track_photo(session_id)
+        Logger.info(f'WebServer: Photo tracked - Total: {total}')
     
     def stop(self):
-        """Stop the web server."""
-        Logger.info('WebServer: Stop requested (requires app restart)')
+        """Stop the web server (the Flask development server can only stop with the app)."""
+        with self._event_condition:
+            self._stopping = True
+            self._event_condition.notify_all()
+        if self._wsgi_server:
+            Logger.info('WebServer: Stopping waitress')
+            # Let the worker threads finish their responses before closing the sockets
+            self._wsgi_server.task_dispatcher.shutdown()
+            self._wsgi_server.close()
+            self._wsgi_server = None
+        else:
+            Logger.info('WebServer: Stop requested (requires app restart)')
+        self.stats.stop()
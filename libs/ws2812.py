@@ -1,28 +1,75 @@
 import numpy as np
 
+def _build_encoding():
+    # Each colour bit is sent as 4 SPI bits (1000 for 0, 1110 for 1): one colour byte is 4 SPI bytes, MSB first
+    table = np.zeros((256, 4), dtype=np.uint8)
+    values = np.arange(256)
+    for ibit in range(4):
+        table[:, 3 - ibit] = ((values >> (2 * ibit + 1)) & 1) * 0x60 + ((values >> (2 * ibit)) & 1) * 0x06 + 0x88
+    return table
+
 class WS2812:
+    """
+    WS2812 LED strip driven through SPI at 3.2 MHz.
+    Pixels are updated in memory with set() and sent as one frame with show(); write() and fill() send at once.
+    """
+    SPEED_HZ = int(4 / 1.25e-6)
+    ENCODING = _build_encoding()
+    GRB = [1, 0, 2]
+
     def __init__(self, spi, nb_leds=12):
+        """
+        Args:
+            spi: Opened spidev.SpiDev (or any object with writebytes2 or xfer)
+            nb_leds: Number of LEDs on the strip
+        """
         self._spi = spi
         self._nb_leds = nb_leds
-        self._pixels = [[0,0,0]]*self._nb_leds
+        self._pixels = np.zeros((nb_leds, 3), dtype=np.uint8)
+        # writebytes2 takes the numpy buffer as is, older spidev versions only have xfer with a list
+        self._writebytes2 = getattr(spi, 'writebytes2', None)
+        if self._writebytes2: spi.max_speed_hz = self.SPEED_HZ
+
+    def encode(self, rgb, brightness=1.0):
+        """
+        Encode a frame into the SPI bitstream.
+
+        Args:
+            rgb: Sequence or (nb_leds, 3) array of [r, g, b] colours (0-255)
+            brightness: Scale applied to every colour (0-1)
+
+        Returns:
+            uint8 numpy array of 12 bytes per LED
+        """
+        pixels = np.asarray(rgb)
+        if brightness != 1.0: pixels = pixels * brightness
+        grb = pixels[:, self.GRB].astype(np.uint8)
+        return self.ENCODING[grb.ravel()].ravel()
+
+    def _send(self, tx):
+        if self._writebytes2:
+            self._writebytes2(tx)
+        else:
+            self._spi.xfer(tx.tolist(), self.SPEED_HZ)
 
     def write(self, rgb, brightness=1.0):
-        self._pixels = rgb
-        scaled_rgb = [[int(c * brightness) for c in color] for color in rgb]
-        grb = [[arr[1], arr[0], arr[2]] for arr in scaled_rgb]
-        d = np.array(grb).ravel()
-        tx = np.zeros(len(d)*4, dtype=np.uint8)
-        for ibit in range(4):
-            tx[3-ibit::4]=((d>>(2*ibit+1))&1)*0x60 + ((d>>(2*ibit+0))&1)*0x06 + 0x88
-        self._spi.xfer(tx.tolist(), int(4/1.25e-6))
+        """Replace every pixel and send the frame."""
+        self._pixels = np.asarray(rgb, dtype=np.uint8).reshape(self._nb_leds, 3).copy()
+        self._send(self.encode(self._pixels, brightness))
 
     def fill(self, color, brightness=1.0):
-        self.write([color]*self._nb_leds)
+        """Set every pixel to the same colour and send the frame."""
+        self._pixels[:] = color
+        self._send(self.encode(self._pixels, brightness))
 
     def set(self, pixel, color, brightness=1.0):
-        self._pixels[pixel] = [int(c * brightness) for c in color]
-        self.write(self._pixels)
+        """Update one pixel in memory (sent by the next show())."""
+        self._pixels[pixel] = np.asarray(color) * brightness
+
+    def show(self, brightness=1.0):
+        """Send the current pixels as one frame."""
+        self._send(self.encode(self._pixels, brightness))
 
     def get(self, pixel=-1):
         if pixel < 0: return self._pixels
-        return self._pixels(pixel)
+        return self._pixels[pixel]
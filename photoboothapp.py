@@ -9,17 +9,20 @@ from datetime import datetime
 
 #os.environ['KIVY_NO_CONSOLELOG'] = '1'
 from kivy.app import App
-from kivy.clock import Clock
+from kivy.clock import Clock, mainthread
 from kivy.logger import Logger
 from kivy.uix.screenmanager import NoTransition
 
 from libs.config import Config
 from libs.device_utils import DeviceUtils
+from libs.filters import FilterEngine, load_filters
 from libs.screens import ScreenMgr
 from libs.ringled import RingLed
+from libs.session_index import SessionIndex
 from libs.template_collage import load_templates
 from libs.usb_transfer import UsbTransfer
 from libs.web_server import WebServer
+from libs.web_process import WebServerProcess
 
 RINGLED = None
 autorestart = True
@@ -49,10 +52,22 @@ class PhotoboothApp(App):
         self.DCIM_DIRECTORY = config.get_dcim_directory()
         self.PRINTER = config.get_printer()
         self.CALIBRATION = config.get_calibration()
+        self.EXPORT_PROFILE = config.get_export_profile()
+        self.EXPORT_BACKGROUND = config.get_export_background()
+        self.EXPORT_BANDWIDTH = config.get_export_bandwidth()
+        self.WEB_URL = config.get_web_url()
+        self.WEB_PROCESS = config.get_web_process()
+        self.WEB_SERVER = config.get_web_server()
+        self.WEB_THREADS = config.get_web_threads()
+        self.WEB_CONNECTION_LIMIT = config.get_web_connection_limit()
+        self.WEB_EVENT_STREAMS = config.get_web_event_streams()
+        self.WEB_RATE_LIMIT = config.get_web_rate_limit()
+        self.WEB_RATE_BURST = config.get_web_rate_burst()
+        self.WEB_MAX_DOWNLOADS = config.get_web_max_downloads()
         
         # Initialize RingLed if enabled in config
         if config.get_ringled():
-            RINGLED = RingLed(num_pixels=12)
+            RINGLED = RingLed(num_pixels=12, simulate=config.get_ringled_simulator())
             Logger.info('PhotoboothApp: RingLed enabled')
         else:
             Logger.info('PhotoboothApp: RingLed disabled')
@@ -62,8 +77,13 @@ class PhotoboothApp(App):
         self._requested_screen = None
         self._requested_kwargs = None
         self.processes = []
+        self._collage_format = 0
+        self._shot_filters = {}
         self.ringled = RINGLED
         self.devices = DeviceUtils(printer_name=self.PRINTER, zoom=self.CALIBRATION)
+        self.filter_engine = FilterEngine()
+        # Event looks from the filters/ directory (too slow ones are rejected)
+        for filter_def in load_filters('filters'): self.filter_engine.register(filter_def)
         
         # Load templates from JSON files
         self.print_formats = load_templates('templates')
@@ -80,13 +100,26 @@ class PhotoboothApp(App):
         if not os.path.exists(self.tmp_directory): os.makedirs(self.tmp_directory)
         if not os.path.exists(self.save_directory): os.makedirs(self.save_directory)
 
+        # Open the session index (built from the save directory on first run)
+        self.session_index = SessionIndex(os.path.join(self.DCIM_DIRECTORY, SessionIndex.FILENAME), os.path.abspath(self.save_directory))
+
         # Start USB transfer
-        UsbTransfer(self, self.save_directory).start()
+        max_rate = self.EXPORT_BANDWIDTH * 1e6 if self.EXPORT_BANDWIDTH > 0 else None
+        UsbTransfer(self, self.save_directory, self.session_index, profile=self.EXPORT_PROFILE, background=self.EXPORT_BACKGROUND, max_rate=max_rate).start()
         
         # Initialize web server for photo gallery (convert to absolute path) only if SHARE is enabled
         if self.SHARE:
             abs_save_directory = os.path.abspath(self.save_directory)
-            self.web_server = WebServer(abs_save_directory, host='0.0.0.0', port=5000)
+            cache_directory = os.path.abspath(os.path.join(self.DCIM_DIRECTORY, 'cache'))
+            web_options = dict(host='0.0.0.0', port=5000, server=self.WEB_SERVER, threads=self.WEB_THREADS,
+                               connection_limit=self.WEB_CONNECTION_LIMIT, event_streams=self.WEB_EVENT_STREAMS,
+                               rate_limit=self.WEB_RATE_LIMIT, rate_burst=self.WEB_RATE_BURST, max_downloads=self.WEB_MAX_DOWNLOADS)
+            if self.WEB_PROCESS:
+                # Separate process at lower priority: guests browsing never slow down the camera preview
+                db_path = os.path.abspath(os.path.join(self.DCIM_DIRECTORY, SessionIndex.FILENAME))
+                self.web_server = WebServerProcess(abs_save_directory, db_path, cache_directory, on_status=self._on_web_status, **web_options)
+            else:
+                self.web_server = WebServer(abs_save_directory, self.session_index, cache_directory, **web_options)
             self.web_server.start()
             Logger.info(f'PhotoboothApp: Web server started for photo gallery at {abs_save_directory}')
         else:
@@ -102,6 +135,12 @@ class PhotoboothApp(App):
     def on_stop(self):
         if self.ringled:
             self.ringled.clear()
+        if self.web_server:
+            self.web_server.stop()
+
+    @mainthread
+    def _on_web_status(self, status):
+        if self.sm: self.sm.get_screen(ScreenMgr.WAITING).on_update({'web': status})
 
     def request_transition_to(self, new_state, **kwargs):
         """
@@ -139,16 +178,25 @@ class PhotoboothApp(App):
         t.start()
         self.processes = [t]
 
+    def set_shot_filter(self, shot_idx, filter_key):
+        """Remember the filter kept for a shot (applied when the collage is assembled)."""
+        self._shot_filters[shot_idx] = filter_key
+
     def is_shot_completed(self, shot_idx):
         if any(process.is_alive() for process in self.processes): return False
         return True
 
     def trigger_collage(self, format=0):
         Logger.info('PhotoboothApp: trigger_collage().')
+        self._collage_format = format
         photos = []
-        for i in range(0, self.get_shots_to_take(format)): photos.append(self.get_shot(i))
+        filters = []
+        for i in range(0, self.get_shots_to_take(format)):
+            photos.append(self.get_shot(i))
+            filters.append(self._shot_filters.get(i, 'color'))
         # Pass for_print=True to enable horizontal duplication for strip formats
-        t = threading.Thread(target=self.print_formats[format].assemble, kwargs={'output_path':self.get_collage(), 'image_paths':photos, 'for_print':True})
+        t = threading.Thread(target=self.print_formats[format].assemble, kwargs={'output_path':self.get_collage(), 'image_paths':photos, 'for_print':True,
+                                                                              'filters':filters, 'filter_engine':self.filter_engine})
         t.start()
         self.processes = [t]
 
@@ -183,22 +231,34 @@ class PhotoboothApp(App):
 
     def save_collage(self):
         Logger.info('PhotoboothApp: save_collage().')
-        # List existing files
-        all_files = os.listdir(self.tmp_directory)
+        # List existing files (exclude small previews and print versions)
+        all_files = [f for f in os.listdir(self.tmp_directory) if '_small' not in f and '_print' not in f]
         if len(all_files) == 0: return
 
         # Create new directory
         now = datetime.now()
-        destination = os.path.join(self.save_directory, now.strftime('%Y%m%d_%H%M%S'))
+        session = now.strftime('%Y%m%d_%H%M%S')
+        destination = os.path.join(self.save_directory, session)
         os.makedirs(destination, exist_ok=True)
 
-        # Move to save_directory (exclude small previews and print versions)
+        # Move to save_directory
         for f in all_files:
-            if '_small' in f or '_print' in f: continue
             src_path = os.path.join(self.tmp_directory, f)
             dst_path = os.path.join(destination, f)
             os.rename(src_path, dst_path)
 
+        # Index the new session
+        template = self.print_formats[self._collage_format].get_name()
+        self.session_index.add_session(session, template=template)
+        if self.web_server: self.web_server.notify_new_session(session)
+        return session
+
+    def get_session_share(self, session):
+        """Return the short code of a saved session and the URL opening its collage, or (None, None)."""
+        info = self.session_index.get_session(session) if session else None
+        if info is None or not info['code']: return None, None
+        return info['code'], f"{self.WEB_URL.rstrip('/')}/c/{info['code']}"
+
     def purge_tmp(self):
         # List existing files and delete (including _print versions)
         all_files = os.listdir(self.tmp_directory)
@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+import numpy as np
+
+os.environ['KIVY_NO_ARGS'] = '1'
+
+sys.path.append('..')
+from libs.ringled import RingLed, boottime
+from libs.spi_simulator import SimulatedSpi, print_frame
+
+# Same sequence as test_ringled.py without hardware: the frames are decoded from the SPI bitstream and checked
+# Usage: python test_ringled_simulated.py [--show] (--show draws the ring in the terminal)
+show = '--show' in sys.argv
+spi = SimulatedSpi(realtime=True, on_frame=print_frame if show else None, clock=boottime)
+leds = RingLed(num_pixels=12, spi=spi)
+leds.clear()
+
+print('Start countdown')
+start = boottime()
+leds.start_countdown(5, start_time=start)
+time.sleep(6)
+frames = spi.get_frames(since=start)
+# Each LED goes off at its own step: compare the number of lit LEDs with the expected one when the frame was sent
+late = []
+for timestamp, frame in frames:
+    lit = int(np.count_nonzero(frame.any(axis=1)))
+    expected = max(0, 12 - int((timestamp - start) * 12 / 5))
+    if lit != expected: late.append(timestamp - start)
+print(f'\n{len(frames)} frames, {len(late)} out of sync')
+assert frames[-1][1].max() == 0, 'Ring not dark at the end of the countdown'
+assert len(late) == 0, f'Frames out of sync at {late}'
+
+print('Start rainbow')
+start = boottime()
+leds.start_rainbow()
+time.sleep(5)
+print(f'\nRainbow: {spi.get_fps(since=start):.1f} fps')
+leds.clear()
+assert spi.get_last_frame().max() == 0, 'Ring not cleared'
+
+print('Start flash')
+start = boottime()
+leds.flash()
+print(f'Flash on after {(spi.get_frames(since=start)[-1][0] - start) * 1000:.1f} ms')
+assert (spi.get_last_frame() == 255).all(), 'Ring not white during the flash'
+time.sleep(0.5)
+leds.flash(stop=True)
+assert spi.get_last_frame().max() == 0, 'Ring not off after the flash'
+time.sleep(1)
+
+print('Start blink')
+start = boottime()
+leds.blink([255, 255, 255])
+time.sleep(5)
+print(f'\nBlink: {len(spi.get_frames(since=start))} frames')
+
+print('Start wave')
+start = boottime()
+leds.wave([255, 255, 255])
+time.sleep(5)
+print(f'\nWave: {spi.get_fps(since=start):.1f} fps')
+
+print('Stop')
+leds.clear()
+assert spi.get_last_frame().max() == 0, 'Ring not cleared'
+assert spi.get_errors() == 0, f'{spi.get_errors()} malformed transfers'
+print('OK')
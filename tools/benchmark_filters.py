@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+import numpy as np
+import cv2
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from libs.filters import FilterEngine, load_filters, make_test_image
+
+# Usage: python3 tools/benchmark_filters.py [IMAGE] [REPEAT]
+# Times every filter on a collage slot sized image (or the given photo), stage by stage vs compiled, and reports the difference
+path = sys.argv[1] if len(sys.argv) > 1 and not sys.argv[1].isdigit() else None
+repeat = int(sys.argv[-1]) if len(sys.argv) > 1 and sys.argv[-1].isdigit() else 3
+
+if path:
+    img = cv2.imread(path)
+    if img is None: sys.exit('Cannot read {}'.format(path))
+else:
+    img = make_test_image(FilterEngine.REFERENCE_SIZE)
+
+def best_time(function):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+# Built-in filters and the plugins of the filters/ directory (not checked against the budget here)
+engine = FilterEngine()
+for filter_def in load_filters('filters'): engine.register(filter_def, budget=None)
+print('{}x{} image, best of {}'.format(img.shape[1], img.shape[0], repeat))
+print('{:<12} {:>10} {:>10} {:>10} {:>8} {:>9} {:>10}'.format('filter', 'reference', 'compiled', 'prepare', 'speedup', 'max diff', 'mean diff'))
+for filter_def in engine.get_filters():
+    key = filter_def['key']
+    start = time.perf_counter()
+    engine.prepare(key)
+    prepare = time.perf_counter() - start
+    reference_time, reference = best_time(lambda: engine.apply_reference(img, key))
+    compiled_time, compiled = best_time(lambda: engine.apply(img, key))
+    diff = np.abs(reference.astype(np.int16) - compiled)
+    print('{:<12} {:>9.3f}s {:>9.3f}s {:>9.3f}s {:>7.1f}x {:>9} {:>10.2f}'.format(key, reference_time, compiled_time, prepare,
+                                                                            reference_time / max(compiled_time, 1e-6), int(diff.max()), diff.mean()))
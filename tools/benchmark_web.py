@@ -0,0 +1,40 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import numpy as np
+import cv2
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from libs.session_index import SessionIndex
+from libs.web_server import WebServer
+
+# Usage: python3 tools/benchmark_web.py [SESSIONS] [REQUESTS]
+# Measures requests per second of the gallery pages on a temporary save directory (no network involved)
+sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+requests = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+directory = tempfile.mkdtemp(prefix='photobooth_bench_')
+try:
+    save_directory = os.path.join(directory, 'save')
+    collage = np.full((1200, 1800, 3), 128, dtype=np.uint8)
+    for i in range(sessions):
+        session_directory = os.path.join(save_directory, '20240101_{:06d}'.format(i))
+        os.makedirs(session_directory)
+        cv2.imwrite(os.path.join(session_directory, 'collage.jpg'), collage)
+
+    index = SessionIndex(os.path.join(directory, SessionIndex.FILENAME), save_directory)
+    client = WebServer(save_directory, index, os.path.join(directory, 'cache')).app.test_client()
+    latest = index.get_latest()
+
+    for name, url in (('/', '/'), ('/gallery', '/gallery'), ('/collage/<session>', '/collage/{}'.format(latest))):
+        client.get(url)
+        start = time.perf_counter()
+        for _ in range(requests):
+            response = client.get(url)
+            response.close()
+        elapsed = time.perf_counter() - start
+        print('{:<20} {:>8.0f} req/s  ({} requests, {} sessions)'.format(name, requests / elapsed, requests, sessions))
+finally:
+    shutil.rmtree(directory)
@@ -0,0 +1,41 @@
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from libs.ws2812 import WS2812
+
+# Usage: python3 tools/benchmark_ws2812.py [SECONDS]
+# Frames per second of the WS2812 encoder for 12 and 60 LEDs: CPU only, then through /dev/spidev0.0 when available
+duration = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+
+class NullSpi:
+    """Discards the frames: measures the encoder alone."""
+    def writebytes2(self, data):
+        pass
+
+def measure(leds, nb_leds):
+    frames = np.random.default_rng(0).integers(0, 256, (64, nb_leds, 3), dtype=np.uint8)
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        leds.write(frames[count % len(frames)], brightness=0.5)
+        count += 1
+    return count / (time.perf_counter() - start)
+
+spi = None
+try:
+    import spidev
+    spi = spidev.SpiDev()
+    spi.open(0, 0)
+except Exception as e:
+    print('No SPI device ({}), measuring the encoder only'.format(e))
+    spi = None
+
+for nb_leds in (12, 60):
+    # 24 bits per LED, 4 SPI bits per bit
+    wire_fps = WS2812.SPEED_HZ / (nb_leds * 24 * 4)
+    print('{:>3} LEDs: encoder {:>8.0f} fps'.format(nb_leds, measure(WS2812(NullSpi(), nb_leds), nb_leds)), end='')
+    if spi: print(', SPI {:>6.0f} fps'.format(measure(WS2812(spi, nb_leds), nb_leds)), end='')
+    print(' (wire limit {:.0f} fps)'.format(wire_fps))
@@ -0,0 +1,16 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from libs.session_index import SessionIndex
+
+# Usage: python3 tools/rebuild_index.py [DCIM_DIRECTORY]
+dcim_directory = sys.argv[1] if len(sys.argv) > 1 else './DCIM'
+save_directory = os.path.abspath(os.path.join(dcim_directory, 'save'))
+if not os.path.exists(save_directory):
+    print('Save directory not found: {}'.format(save_directory))
+    sys.exit(1)
+
+index = SessionIndex(os.path.join(dcim_directory, SessionIndex.FILENAME), save_directory)
+count = index.rebuild()
+print('Indexed {} sessions ({} with a collage) from {}'.format(count, index.count(), save_directory))